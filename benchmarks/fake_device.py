@@ -0,0 +1,179 @@
+import os
+import random
+import threading
+import time
+
+def render_config(hostname, version, lines=200):
+    """
+    Config bergaya IOS yang deterministik untuk (hostname, version).
+    Ukuran kira-kira `lines` baris; setiap versi mengubah beberapa baris saja
+    (deskripsi interface & ntp), mirip perubahan harian di jaringan nyata.
+    """
+    out = [
+        "Building configuration...",
+        "",
+        f"Current configuration : {lines * 30} bytes",
+        "!",
+        f"! Last configuration change at 10:00:{version % 60:02d} UTC v{version}",
+        "!",
+        "version 17.3",
+        f"hostname {hostname}",
+        "!",
+    ]
+    intf = 0
+    while len(out) < lines - 6:
+        changed = version and intf % 7 == version % 7
+        out += [
+            f"interface GigabitEthernet0/{intf}",
+            f" description {'uplink' if intf % 2 else 'access'} {hostname} v{version if changed else 0}",
+            f" ip address 10.{intf // 250}.{intf % 250}.1 255.255.255.0",
+            " no shutdown",
+            "!",
+        ]
+        intf += 1
+    out += [
+        f"ntp server 10.0.{version % 250}.5",
+        "ip access-list extended MGMT",
+        " permit tcp 10.0.0.0 0.0.255.255 any eq 22",
+        " deny ip any any log",
+        "!",
+        "end",
+    ]
+    return "\n".join(out)
+
+class FakeFleet:
+    """
+    Pengganti ConnectHandler Netmiko untuk benchmark (tanpa jaringan).
+    - connect_latency / command_latency: jeda (detik) login & tiap perintah,
+      jitter: variasi acak relatif (0.5 = +-50%).
+    - bytes_per_second: kecepatan "transfer" output show running-config.
+    - change_rate: peluang config berubah per siklus (lihat next_cycle()).
+    - fail_rate: peluang koneksi gagal (untuk menguji jalur error).
+    - names: dict ip -> hostname, dipakai untuk baris "hostname" di config.
+    """
+
+    def __init__(self, connect_latency=0.05, command_latency=0.02, jitter=0.3,
+                 bytes_per_second=2_000_000, config_lines=200, change_rate=0.1,
+                 fail_rate=0.0, seed=1, names=None):
+        self.connect_latency = connect_latency
+        self.command_latency = command_latency
+        self.jitter = jitter
+        self.bytes_per_second = bytes_per_second
+        self.config_lines = config_lines
+        self.change_rate = change_rate
+        self.fail_rate = fail_rate
+        self.names = names or {}  # ip -> hostname (untuk baris "hostname" di config)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.versions = {}  # ip -> (versi config saat ini, siklus terakhir diundi)
+        self.epoch = 0
+        self.connections = 0
+        self.commands = 0
+
+    def _sleep(self, base):
+        if base <= 0:
+            return
+        with self._lock:
+            factor = 1 + self._rng.uniform(-self.jitter, self.jitter)
+        time.sleep(base * factor)
+
+    def _roll(self, rate):
+        with self._lock:
+            return self._rng.random() < rate
+
+    def connect(self, **params):
+        """Dipasang sebagai pengganti ConnectHandler(**params)."""
+        self._sleep(self.connect_latency)
+        if self.fail_rate and self._roll(self.fail_rate):
+            raise ConnectionError(f"Simulasi: {params['host']} tidak bisa dihubungi")
+        with self._lock:
+            self.connections += 1
+        return FakeConnection(self, params['host'])
+
+    def next_cycle(self):
+        """Mulai siklus backup baru; tiap router paling banyak berubah sekali per siklus."""
+        with self._lock:
+            self.epoch += 1
+
+    def version(self, host):
+        with self._lock:
+            version, epoch = self.versions.get(host, (0, self.epoch))
+            if epoch != self.epoch:
+                if self._rng.random() < self.change_rate:
+                    version += 1
+                epoch = self.epoch
+            self.versions[host] = (version, epoch)
+            return version
+
+class FakeConnection:
+    # Ukuran potongan output per read_channel (kira-kira satu read dari socket SSH)
+    READ_CHUNK = 4096
+
+    def __init__(self, fleet, host):
+        self.fleet = fleet
+        self.host = host
+        self.hostname = fleet.names.get(host, host)
+        self.alive = True
+        self._channel = []  # potongan output yang belum dibaca lewat read_channel
+
+    def enable(self):
+        self.fleet._sleep(self.fleet.command_latency)
+
+    def _output(self, command):
+        fleet = self.fleet
+        with fleet._lock:
+            fleet.commands += 1
+        fleet._sleep(fleet.command_latency)
+        if command.startswith("show logging | include %SYS-5-CONFIG_I"):
+            # Satu entri CONFIG_I per perubahan config (buffer log probe IOS)
+            return "\n".join(
+                f"*Jan  1 10:00:{v % 60:02d}: %SYS-5-CONFIG_I: Configured from console by admin on vty0 (v{v})"
+                for v in range(1, fleet.version(self.host) + 1)
+            )
+        if command.startswith("show running-config"):
+            return render_config(self.hostname, fleet.version(self.host), fleet.config_lines)
+        if command.startswith("configure replace"):
+            return "Rollback of configuration completed\n#"
+        return ""
+
+    def send_command(self, command, **kwargs):
+        output = self._output(command)
+        self.fleet._sleep(len(output) / self.fleet.bytes_per_second)
+        return output
+
+    # --- Akses channel mentah (dipakai capture streaming) ---
+    def find_prompt(self):
+        return f"{self.hostname}#"
+
+    def normalize_cmd(self, command):
+        return command.rstrip() + "\n"
+
+    def write_channel(self, data):
+        command = data.strip()
+        text = f"{command}\n{self._output(command)}\n{self.find_prompt()}"
+        self._channel = [text[i:i + self.READ_CHUNK] for i in range(0, len(text), self.READ_CHUNK)]
+        self._channel.reverse()
+
+    def read_channel(self):
+        if not self._channel:
+            return ""
+        chunk = self._channel.pop()
+        self.fleet._sleep(len(chunk) / self.fleet.bytes_per_second)
+        return chunk
+
+    def send_config_set(self, commands, **kwargs):
+        self.fleet._sleep(self.fleet.command_latency * max(len(commands), 1) / 10)
+        return "\n".join(commands)
+
+    def is_alive(self):
+        return self.alive
+
+    def disconnect(self):
+        self.alive = False
+
+def fake_file_transfer(fleet):
+    """Pengganti netmiko.file_transfer: jeda sebanding ukuran file."""
+    def _transfer(net_connect, source_file, **kwargs):
+        fleet._sleep(fleet.command_latency + os.path.getsize(source_file) / fleet.bytes_per_second)
+        return {"file_exists": True, "file_transferred": True, "file_verified": True}
+    return _transfer
@@ -0,0 +1,289 @@
+# Benchmark backup/restore & query dashboard terhadap armada router palsu (offline).
+# Contoh:
+#   python benchmarks/run_bench.py                       # profil default, bandingkan dengan baseline
+#   python benchmarks/run_bench.py --hosts 5000 --commits 20000 --profile large
+#   python benchmarks/run_bench.py --update-baseline     # simpan hasil sebagai baseline baru
+# Exit code 1 jika ada skenario yang lebih lambat dari baseline melebihi toleransi
+# (p95 / waktu per operasi harus naik melebihi toleransi relatif DAN --min-delta-ms;
+# timing beberapa ms saja bisa goyah 20-30% hanya karena jitter scheduler).
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import shutil
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path[:0] = [BENCH_DIR, ROOT_DIR]
+
+from fake_device import FakeFleet, fake_file_transfer
+from synth_repo import build_workspace
+
+BASELINE_FILE = os.path.join(BENCH_DIR, "baselines.json")
+SCENARIOS = ("backup_task", "cron_fleet", "git_queries", "restore")
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+def summarize(name, samples, wall=None):
+    """samples: list durasi (detik) per operasi. wall: durasi total jika operasi paralel."""
+    wall = wall if wall is not None else sum(samples)
+    return {
+        "scenario": name,
+        "ops": len(samples),
+        "seconds": round(wall, 3),
+        "throughput": round(len(samples) / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 95) * 1000, 2),
+        "p99_ms": round(percentile(samples, 99) * 1000, 2),
+        "max_ms": round(max(samples) * 1000, 2) if samples else 0.0,
+    }
+
+def timed_calls(fn, args_list):
+    samples = []
+    for args in args_list:
+        started = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+# --- Skenario ---
+def bench_backup_task(backend, fleet, routers, opts, rng):
+    """run_backup_task serial (seperti tombol backup di dashboard)."""
+    sample = rng.sample(routers, min(opts.sample, len(routers)))
+    fleet.next_cycle()
+    samples = timed_calls(
+        backend.run_backup_task,
+        [(r['hostname'], r['ip'], r['device_type'], opts.device_timeout) for r in sample]
+    )
+    return [summarize("backup_task", samples)]
+
+def bench_cron_fleet(backend, fleet, routers, opts, rng):
+    """Satu putaran cron_script per siklus: run_backup_fleet ke seluruh inventory."""
+    results = []
+    for cycle in range(opts.cycles):
+        fleet.next_cycle()
+        summary = backend.run_backup_fleet(
+            routers, max_workers=opts.workers, device_timeout=opts.device_timeout,
+            batch=opts.batch, probe=opts.probe
+        )
+        row = summarize(f"cron_fleet#{cycle + 1}",
+                        [x['duration'] for x in summary['results']], wall=summary['duration'])
+        row["changed"] = summary['changed']
+        row["failed"] = summary['failed'] + summary['timeout']
+        results.append(row)
+    return results
+
+def bench_git_queries(backend, fleet, routers, opts, rng):
+    """Query yang dipakai dashboard, terhadap repo sintetis."""
+    results = []
+    hosts = [r['hostname'] for r in rng.sample(routers, min(opts.sample, len(routers)))]
+    results.append(summarize("history", timed_calls(backend.get_router_history, [(h,) for h in hosts])))
+    results.append(summarize("stable_commit", timed_calls(backend.find_smart_stable_commit, [(h,) for h in hosts])))
+    results.append(summarize("last_changes", timed_calls(backend.get_last_change_times, [(None,)] * 20)))
+    results.append(summarize("audit_page", timed_calls(
+        lambda page: backend.get_audit_log(limit=20, offset=page * 20), [(p,) for p in range(50)]
+    )))
+    results.append(summarize("audit_host", timed_calls(
+        lambda h: backend.get_audit_log(limit=20, hostname=h), [(h,) for h in hosts]
+    )))
+
+    pairs = []
+    for h in hosts:
+        history = backend.get_router_history(h, limit=2)
+        if len(history) == 2:
+            pairs.append((h, history[1]['hash'], history[0]['hash']))
+    backend._diff_blobs.cache_clear()
+    results.append(summarize("diff", timed_calls(backend.diff_router_commits, pairs)))
+    return results
+
+def bench_restore(backend, fleet, routers, opts, rng):
+    """Restore (delta & full) ke versi sebelumnya untuk sampel router."""
+    results = []
+    targets = []
+    for r in rng.sample(routers, min(opts.sample, len(routers))):
+        history = backend.get_router_history(r['hostname'], limit=2)
+        if len(history) == 2:
+            targets.append((r, history[1]['hash']))
+    for mode in ("delta", "full"):
+        samples = timed_calls(
+            lambda r, sha: backend.run_restore_task(r['hostname'], r['ip'], r['device_type'], sha, mode=mode),
+            targets
+        )
+        results.append(summarize(f"restore_{mode}", samples))
+    started = time.perf_counter()
+    list(backend.iter_batch_restore(targets, max_workers=opts.workers, wave_size=opts.workers * 2, mode="delta"))
+    wall = time.perf_counter() - started
+    results.append(summarize("restore_batch", [wall / max(len(targets), 1)] * len(targets), wall=wall))
+    return results
+
+BENCHES = {
+    "backup_task": bench_backup_task,
+    "cron_fleet": bench_cron_fleet,
+    "git_queries": bench_git_queries,
+    "restore": bench_restore,
+}
+
+# --- Baseline ---
+def params_of(opts):
+    keys = ("hosts", "commits", "hosts_per_commit", "config_lines", "connect_latency",
+            "command_latency", "change_rate", "workers", "batch", "probe", "sample", "cycles")
+    return {k: getattr(opts, k) for k in keys}
+
+def compare(rows, baseline, tolerance, min_delta_ms=0.0):
+    """
+    Return list pesan regresi (p95 naik / throughput turun melebihi toleransi).
+    Kenaikan p95 / waktu rata-rata per operasi di bawah min_delta_ms (absolut) tidak
+    dihitung regresi.
+    """
+    regressions = []
+    for row in rows:
+        base = baseline.get(row["scenario"])
+        if not base:
+            continue
+        if (base["p95_ms"] and row["p95_ms"] > base["p95_ms"] * (1 + tolerance)
+                and row["p95_ms"] - base["p95_ms"] > min_delta_ms):
+            regressions.append(f"{row['scenario']}: p95 {row['p95_ms']}ms > baseline {base['p95_ms']}ms")
+        if (base["throughput"] and row["throughput"] < base["throughput"] * (1 - tolerance)
+                and 1000 / max(row["throughput"], 1e-9) - 1000 / base["throughput"] > min_delta_ms):
+            regressions.append(f"{row['scenario']}: throughput {row['throughput']}/s < baseline {base['throughput']}/s")
+    return regressions
+
+def print_table(rows, baseline):
+    header = f"{'scenario':<18}{'ops':>7}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'vs base p95':>13}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        base = baseline.get(row["scenario"], {}).get("p95_ms")
+        delta = f"{(row['p95_ms'] / base - 1) * 100:+.0f}%" if base else "-"
+        print(f"{row['scenario']:<18}{row['ops']:>7}{row['throughput']:>10}{row['p50_ms']:>10}"
+              f"{row['p95_ms']:>10}{row['p99_ms']:>10}{row['max_ms']:>10}{delta:>13}")
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark NetAuto dengan router palsu")
+    ap.add_argument("--profile", default="default", help="nama baseline di baselines.json")
+    ap.add_argument("--scenarios", default=",".join(SCENARIOS))
+    ap.add_argument("--hosts", type=int, default=1000)
+    ap.add_argument("--commits", type=int, default=2000)
+    ap.add_argument("--hosts-per-commit", type=int, default=3)
+    ap.add_argument("--config-lines", type=int, default=200)
+    ap.add_argument("--connect-latency", type=float, default=0.05)
+    ap.add_argument("--command-latency", type=float, default=0.02)
+    ap.add_argument("--change-rate", type=float, default=0.05)
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    ap.add_argument("--workers", type=int, default=20)
+    ap.add_argument("--device-timeout", type=int, default=60)
+    ap.add_argument("--batch", type=int, choices=(0, 1), default=1)
+    ap.add_argument("--probe", type=int, choices=(0, 1), default=0)
+    ap.add_argument("--sample", type=int, default=100, help="jumlah router untuk skenario per-router")
+    ap.add_argument("--cycles", type=int, default=3, help="jumlah putaran cron_fleet")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--workdir", help="direktori kerja (default: temp, dihapus setelah selesai)")
+    ap.add_argument("--keep", action="store_true", help="jangan hapus direktori kerja")
+    ap.add_argument("--tolerance", type=float, default=0.25)
+    ap.add_argument("--min-delta-ms", type=float, default=2.0,
+                    help="kenaikan minimum (ms) p95 / waktu per operasi agar dianggap regresi")
+    ap.add_argument("--update-baseline", action="store_true")
+    ap.add_argument("--json", help="simpan hasil ke file JSON")
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    opts = parse_args(argv)
+    opts.batch, opts.probe = bool(opts.batch), bool(opts.probe)
+    scenarios = [s.strip() for s in opts.scenarios.split(",") if s.strip()]
+    unknown = set(scenarios) - set(BENCHES)
+    if unknown:
+        sys.exit(f"Skenario tidak dikenal: {', '.join(sorted(unknown))}")
+
+    workdir = opts.workdir or tempfile.mkdtemp(prefix="netauto_bench_")
+    print(f"[BENCH] Workspace {workdir}: {opts.hosts} router, {opts.commits} commit ...", flush=True)
+    started = time.perf_counter()
+    routers, versions = build_workspace(workdir, opts.hosts, opts.commits, opts.hosts_per_commit,
+                                        opts.config_lines, opts.seed)
+    print(f"[BENCH] Repo sintetis siap dalam {time.perf_counter() - started:.1f}s", flush=True)
+
+    # backend membaca backups/ & inventory.yaml relatif terhadap cwd saat di-import
+    os.chdir(workdir)
+    os.environ.update({"TELEGRAM_TOKEN": "", "BACKUP_BATCH": str(int(opts.batch))})
+    import backend
+
+    fleet = FakeFleet(
+        connect_latency=opts.connect_latency, command_latency=opts.command_latency,
+        config_lines=opts.config_lines, change_rate=opts.change_rate,
+        fail_rate=opts.fail_rate, seed=opts.seed,
+        names={r['ip']: r['hostname'] for r in routers},
+    )
+    # Router palsu mulai dari versi terakhir yang ada di repo sintetis
+    fleet.versions = {r['ip']: (versions[r['hostname']], 0) for r in routers}
+    backend.ConnectHandler = fleet.connect
+    backend.file_transfer = fake_file_transfer(fleet)
+    # Benchmark harus offline: notifikasi Telegram tidak dikirim
+    backend.send_alert = lambda *args, **kwargs: None
+
+    rng = random.Random(opts.seed)
+    rows = []
+    try:
+        # Index commit masih kosong: ukur sync penuh sebelum skenario lain mengisinya
+        started = time.perf_counter()
+        for shard in backend.SHARDS.readable():
+            shard.index.sync()
+        rows.append(summarize("index_sync_cold", [time.perf_counter() - started]))
+        for name in scenarios:
+            print(f"[BENCH] {name} ...", flush=True)
+            rows.extend(BENCHES[name](backend, fleet, routers, opts, rng))
+    finally:
+        os.chdir(ROOT_DIR)
+        if not opts.workdir and not opts.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    baselines = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE) as f:
+            baselines = json.load(f)
+    profile = baselines.get(opts.profile, {})
+    if profile and profile.get("params") != params_of(opts):
+        print(f"[BENCH] Peringatan: parameter berbeda dengan baseline '{opts.profile}', perbandingan kurang valid")
+    baseline_rows = profile.get("results", {})
+
+    print()
+    print_table(rows, baseline_rows)
+    result = {
+        "params": params_of(opts),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "cpus": os.cpu_count()},
+        "recorded_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "results": {row["scenario"]: row for row in rows},
+    }
+    if opts.json:
+        with open(opts.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+    if opts.update_baseline:
+        baselines[opts.profile] = result
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\n[BENCH] Baseline '{opts.profile}' diperbarui.")
+        return 0
+
+    regressions = compare(rows, baseline_rows, opts.tolerance, opts.min_delta_ms)
+    if regressions:
+        print("\n[REGRESI]")
+        for msg in regressions:
+            print(f"  - {msg}")
+        return 1
+    print("\n[BENCH] Tidak ada regresi." if baseline_rows else "\n[BENCH] Belum ada baseline untuk profil ini.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
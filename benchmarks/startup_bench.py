@@ -0,0 +1,157 @@
+# Benchmark waktu start proses yang memakai backend (cron per menit, dashboard, worker).
+# Tiap sampel = proses Python baru, jadi cache import & koneksi tidak terbawa antar sampel.
+# Contoh:
+#   python benchmarks/startup_bench.py                      # tree saat ini
+#   python benchmarks/startup_bench.py --baseline HEAD~1    # bandingkan dengan revisi lain
+#   python benchmarks/startup_bench.py --runs 20 --hosts 500
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import shutil
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path[:0] = [BENCH_DIR, ROOT_DIR]
+
+from synth_repo import build_workspace
+from run_bench import percentile
+
+HEAVY_MODULES = ("netmiko", "paramiko", "git", "requests", "yaml")
+
+# Kode yang dijalankan di proses anak; waktu diukur dari sebelum import backend
+_PRELUDE = "import sys, time, json\n_t0 = time.perf_counter()\n"
+_EPILOGUE = (
+    "print(json.dumps({'seconds': time.perf_counter() - _t0,"
+    " 'modules': [m for m in %r if m in sys.modules]}))\n" % (HEAVY_MODULES,)
+)
+SCENARIOS = {
+    # Hanya import (batas bawah semua entry point)
+    "import": "import backend\n",
+    # Cron per menit yang tidak punya router jatuh tempo (alur cron_script.run()):
+    # lock, inventory, jadwal, lalu perawatan repo yang selalu dipanggil di akhir
+    "cron_idle": (
+        "import backend\n"
+        "from scheduler import run_lock\n"
+        "with run_lock(backend.RUN_LOCK_FILE) as ok:\n"
+        "    routers = backend.load_inventory()['routers']\n"
+        "    due = getattr(backend, 'due_routers', lambda r: r)(routers)\n"
+        "    backend.run_repo_maintenance()\n"
+    ),
+    # Render pertama dashboard: kunci cache inventory & repo
+    "dashboard": (
+        "import backend\n"
+        "backend.get_inventory_version()\n"
+        "backend.load_inventory()\n"
+        "backend.get_repo_version()\n"
+    ),
+}
+
+def run_child(tree, workdir, code):
+    """Satu proses baru. Return (detik di dalam proses, detik total proses, modul berat)."""
+    env = dict(os.environ, PYTHONPATH=tree, TELEGRAM_TOKEN="", PYTHONDONTWRITEBYTECODE="1")
+    started = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", _PRELUDE + code + _EPILOGUE], cwd=workdir, env=env,
+                         capture_output=True, text=True)
+    total = time.perf_counter() - started
+    if out.returncode != 0:
+        raise RuntimeError(f"Proses anak gagal:\n{out.stderr.strip()}")
+    data = json.loads(out.stdout.strip().splitlines()[-1])
+    return data["seconds"], total, data["modules"]
+
+def extract_tree(rev, dest):
+    """Isi revisi git `rev` ke direktori dest (tanpa menyentuh working tree)."""
+    os.makedirs(dest, exist_ok=True)
+    archive = subprocess.run(["git", "-C", ROOT_DIR, "archive", rev], check=True, capture_output=True)
+    subprocess.run(["tar", "-x", "-C", dest], input=archive.stdout, check=True)
+    return dest
+
+def mark_all_scheduled(workdir, routers):
+    """Semua router belum jatuh tempo -> cron_idle mengukur jalur 'tidak ada pekerjaan'."""
+    path = os.path.join(workdir, "state", "schedule.json")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    far = time.time() + 86400
+    with open(path, "w") as f:
+        json.dump({r['hostname']: {"interval": 900, "next_due": far, "failures": 0, "changes": []}
+                   for r in routers}, f)
+
+def measure(trees, workdir, scenarios, runs):
+    """Sampel diselang-seling antar tree supaya beban mesin yang berubah terbagi rata."""
+    samples = {(label, name): [] for label in trees for name in scenarios}
+    modules = {}
+    for label, tree in trees.items():
+        for name in scenarios:
+            run_child(tree, workdir, SCENARIOS[name])  # pemanasan page cache & index
+    for _ in range(runs):
+        for name in scenarios:
+            for label, tree in trees.items():
+                inner, total, mods = run_child(tree, workdir, SCENARIOS[name])
+                samples[(label, name)].append((inner, total))
+                modules[(label, name)] = mods
+    rows = []
+    for (label, name), values in samples.items():
+        inner = [v[0] for v in values]
+        total = [v[1] for v in values]
+        rows.append({
+            "tree": label, "scenario": name, "runs": len(values),
+            "p50_ms": round(percentile(inner, 50) * 1000, 1),
+            "p95_ms": round(percentile(inner, 95) * 1000, 1),
+            "process_p50_ms": round(percentile(total, 50) * 1000, 1),
+            "heavy_modules": modules[(label, name)],
+        })
+    return rows
+
+def print_table(rows):
+    print(f"{'tree':<12}{'scenario':<12}{'p50 ms':>9}{'p95 ms':>9}{'proses ms':>11}  modul berat ter-load")
+    for row in rows:
+        print(f"{row['tree']:<12}{row['scenario']:<12}{row['p50_ms']:>9}{row['p95_ms']:>9}"
+              f"{row['process_p50_ms']:>11}  {', '.join(row['heavy_modules']) or '-'}")
+    current = {r['scenario']: r for r in rows if r['tree'] == "current"}
+    for row in rows:
+        if row['tree'] != "current" and row['scenario'] in current and row['p50_ms']:
+            speedup = row['p50_ms'] / max(current[row['scenario']]['p50_ms'], 0.1)
+            print(f"[BENCH] {row['scenario']}: {speedup:.1f}x lebih cepat dari {row['tree']}")
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark waktu start entry point NetAuto")
+    ap.add_argument("--scenarios", default=",".join(SCENARIOS))
+    ap.add_argument("--runs", type=int, default=10, help="jumlah proses per skenario")
+    ap.add_argument("--hosts", type=int, default=200)
+    ap.add_argument("--commits", type=int, default=100)
+    ap.add_argument("--baseline", help="revisi git pembanding (misal HEAD~1)")
+    ap.add_argument("--workdir", help="direktori kerja (default: temp, dihapus setelah selesai)")
+    ap.add_argument("--json", help="simpan hasil ke file JSON")
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    opts = parse_args(argv)
+    scenarios = [s.strip() for s in opts.scenarios.split(",") if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        sys.exit(f"Skenario tidak dikenal: {', '.join(sorted(unknown))}")
+
+    tmp = tempfile.mkdtemp(prefix="netauto_startup_")
+    workdir = opts.workdir or os.path.join(tmp, "work")
+    try:
+        print(f"[BENCH] Workspace {workdir}: {opts.hosts} router, {opts.commits} commit ...", flush=True)
+        routers, _ = build_workspace(workdir, opts.hosts, opts.commits)
+        mark_all_scheduled(workdir, routers)
+        trees = {"current": ROOT_DIR}
+        if opts.baseline:
+            trees[opts.baseline] = extract_tree(opts.baseline, os.path.join(tmp, "baseline"))
+        rows = measure(trees, workdir, scenarios, opts.runs)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print()
+    print_table(rows)
+    if opts.json:
+        with open(opts.json, "w") as f:
+            json.dump(rows, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
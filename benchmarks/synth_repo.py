@@ -0,0 +1,86 @@
+import os
+import random
+import subprocess
+import time
+import yaml
+from fake_device import render_config
+
+def stored_config(hostname, version, config_lines):
+    """Isi file .cfg seperti yang disimpan backend (baris timestamp volatil dibuang)."""
+    raw = render_config(hostname, version, config_lines)
+    return "\n".join(l for l in raw.splitlines() if not l.startswith("! Last configuration")).strip()
+
+def host_list(count):
+    """Router sintetis: hostname rtr-00001.. dengan IP 10.x.y.z yang unik."""
+    return [
+        {"hostname": f"rtr-{i:05d}", "ip": f"10.{100 + i // 65536}.{(i // 256) % 256}.{i % 256}",
+         "device_type": "cisco_ios"}
+        for i in range(1, count + 1)
+    ]
+
+def write_inventory(path, routers):
+    with open(path, "w") as f:
+        yaml.dump({"routers": routers}, f, default_flow_style=False)
+
+def build_repo(path, routers, commits, hosts_per_commit=3, config_lines=200, seed=1):
+    """
+    Buat repo backups/ sintetis dengan `git fast-import` (jauh lebih cepat dari
+    commit satu per satu): commit awal berisi semua router, lalu `commits` commit
+    yang masing-masing mengubah beberapa router acak. Format file & pesan commit
+    sama dengan yang dibuat backend. Return: dict hostname -> versi terakhir.
+    """
+    rng = random.Random(seed)
+    subprocess.run(["git", "init", "-q", path], check=True)
+    branch = subprocess.run(
+        ["git", "-C", path, "symbolic-ref", "HEAD"], check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+    versions = {r["hostname"]: 0 for r in routers}
+    names = list(versions)
+    start = int(time.time()) - (commits + 1) * 60
+
+    proc = subprocess.Popen(["git", "-C", path, "fast-import", "--quiet"], stdin=subprocess.PIPE)
+    out = proc.stdin
+
+    def data(text):
+        raw = text.encode("utf-8")
+        out.write(b"data %d\n" % len(raw))
+        out.write(raw + b"\n")
+
+    for n in range(commits + 1):
+        ts = start + n * 60
+        changed = names if n == 0 else rng.sample(names, min(hosts_per_commit, len(names)))
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
+        if len(changed) == 1:
+            message = f"Backup {changed[0]} at {stamp}"
+        else:
+            shown = ", ".join(changed[:5]) + (f" (+{len(changed) - 5} lainnya)" if len(changed) > 5 else "")
+            message = f"Backup {shown} at {stamp}"
+
+        out.write(f"commit {branch}\nmark :{n + 1}\n".encode())
+        out.write(f"committer NetAuto Bench <bench@localhost> {ts} +0000\n".encode())
+        data(message)
+        if n:
+            out.write(f"from :{n}\n".encode())
+        for hostname in changed:
+            if n:
+                versions[hostname] += 1
+            out.write(f"M 100644 inline {hostname}.cfg\n".encode())
+            data(stored_config(hostname, versions[hostname], config_lines))
+        out.write(b"\n")
+
+    out.close()
+    if proc.wait() != 0:
+        raise RuntimeError("git fast-import gagal")
+    # Working tree & index disamakan dengan HEAD (backend menulis & commit di sini)
+    subprocess.run(["git", "-C", path, "reset", "-q", "--hard"], check=True)
+    return versions
+
+def build_workspace(root, hosts, commits, hosts_per_commit=3, config_lines=200, seed=1):
+    """Direktori kerja lengkap (backups/ + inventory.yaml) untuk satu benchmark."""
+    os.makedirs(root, exist_ok=True)
+    routers = host_list(hosts)
+    write_inventory(os.path.join(root, "inventory.yaml"), routers)
+    versions = build_repo(os.path.join(root, "backups"), routers, commits,
+                          hosts_per_commit, config_lines, seed)
+    return routers, versions
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import threading
+
+def content_hash(text):
+    """Hash isi config (sha256 dari teks UTF-8)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class ChangeCache:
+    """
+    Cache hash isi config terakhir yang sudah ter-commit, per hostname.
+    - Disimpan di file JSON bersama sha HEAD saat cache ditulis.
+    - Jika HEAD repo berbeda (misal commit dari proses lain), hanya file yang
+      berubah di antara dua HEAD yang di-hash ulang; jika tidak bisa, rebuild penuh dari HEAD.
+    - is_unchanged() cukup satu hash teks + baca ref HEAD, tanpa tulis file / operasi index.
+    """
+
+    def __init__(self, repo, path, suffix=".cfg", repo_lock=None):
+        self.repo = repo
+        self.path = path
+        self.suffix = suffix
+        # repo_lock: lock yang sama dengan pemakai REPO lain (object db Git tidak thread-safe).
+        # Urutan lock selalu repo_lock -> _lock.
+        self.repo_lock = repo_lock or threading.RLock()
+        self._lock = threading.Lock()
+        self._head = None
+        self._hashes = None
+
+    # --- API ---
+    def is_unchanged(self, hostname, digest):
+        head = self._current_head()
+        with self._lock:
+            # Jalur cepat: HEAD belum bergeser sejak cache terakhir disinkronkan
+            if self._hashes is not None and self._head == head:
+                return self._hashes.get(hostname) == digest
+        with self.repo_lock, self._lock:
+            self._sync()
+            return self._hashes.get(hostname) == digest
+
+    def record(self, digests, parent=None):
+        """
+        Catat hash setelah commit (atau setelah Git memastikan isinya identik).
+        parent: sha HEAD sebelum commit kita; jika cocok dengan cache, tidak perlu sinkron ulang.
+        """
+        with self.repo_lock, self._lock:
+            if self._hashes is None or parent is None or self._head != parent:
+                self._sync()
+            self._hashes.update(digests)
+            self._head = self._current_head()
+            self._save()
+
+    # --- Internal ---
+    def _current_head(self):
+        # Dibaca dari file ref saja, tanpa object db: is_unchanged() dipanggil tanpa
+        # repo_lock dari banyak thread, sedangkan proses cat-file GitPython tidak thread-safe.
+        from git import SymbolicReference
+        try:
+            return SymbolicReference.dereference_recursive(self.repo, "HEAD")
+        except ValueError:
+            return None  # repo belum punya commit
+
+    def _sync(self):
+        head = self._current_head()
+        if self._hashes is None:
+            self._load()
+        if self._hashes is not None and self._head == head:
+            return
+        if not (self._hashes is not None and self._head and head and self._update_between(self._head, head)):
+            self._rebuild(head)
+        self._head = head
+        self._save()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            self._head = data.get("head")
+            self._hashes = data.get("hashes", {})
+        except (OSError, ValueError):
+            self._head, self._hashes = None, None
+
+    def _update_between(self, old, new):
+        # Hash ulang hanya file yang berubah di antara dua commit
+        try:
+            diffs = self.repo.commit(old).diff(new)
+        except Exception:
+            return False
+        tree = self.repo.commit(new).tree
+        for d in diffs:
+            for path in {d.a_path, d.b_path}:
+                if not path or not path.endswith(self.suffix) or "/" in path:
+                    continue
+                hostname = path[:-len(self.suffix)]
+                try:
+                    self._hashes[hostname] = self._blob_hash(tree / path)
+                except KeyError:
+                    self._hashes.pop(hostname, None)  # file dihapus
+        return True
+
+    def _rebuild(self, head):
+        self._hashes = {}
+        if head is None:
+            return
+        for blob in self.repo.commit(head).tree.blobs:
+            if blob.name.endswith(self.suffix):
+                self._hashes[blob.name[:-len(self.suffix)]] = self._blob_hash(blob)
+
+    def _blob_hash(self, blob):
+        h = hashlib.sha256()
+        stream = blob.data_stream
+        while True:
+            chunk = stream.read(65536)
+            if not chunk:
+                break
+            h.update(chunk)
+        return h.hexdigest()
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump({"head": self._head, "hashes": self._hashes}, f)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+# Perintah murah yang outputnya ikut berubah setiap kali config berubah.
+# "filter" (regex, opsional) mengambil bagian output yang relevan sebagai penanda.
+PROBES = {
+    # IOS/IOS-XE: entri "%SYS-5-CONFIG_I" (keluar dari configure terminal) di buffer log.
+    # Sengaja bukan "show running-config | include Last configuration change": filter
+    # "| include" baru jalan setelah router membangun seluruh running-config (NVGEN),
+    # jadi biayanya sama dengan full pull. Membaca buffer log tidak membangun config.
+    # Keterbatasan: butuh "logging buffered" (level >= notifications); tanpa itu output
+    # kosong -> selalu full pull. Buffer yang berputar hanya memicu full pull ekstra.
+    # Perubahan yang tidak menulis CONFIG_I (misal SNMP/copy ke running-config) baru
+    # tertangkap oleh full pull paksa (PROBE_FULL_INTERVAL).
+    "cisco_ios": {
+        "command": "show logging | include %SYS-5-CONFIG_I",
+        "filter": None,
+    },
+    # RouterOS: entri undo history terakhir (waktu & aksi perubahan)
+    "mikrotik_routeros": {
+        "command": "/system history print without-paging",
+        "filter": None,
+    },
+    # JunOS: commit terakhir (nomor 0) beserta waktu & user
+    "juniper_junos": {
+        "command": 'show system commit | match "^0 "',
+        "filter": r"^0\s+.*",
+    },
+}
+
+def register_probe(device_type, command, filter=None):
+    """Tambah / ganti probe untuk device_type lain."""
+    PROBES[device_type] = {"command": command, "filter": filter}
+
+def read_marker(net_connect, device_type, timeout=None):
+    """
+    Jalankan probe & kembalikan penanda (hash output). None jika device_type
+    tidak punya probe atau outputnya tidak bisa dipakai -> wajib full pull.
+    """
+    probe = PROBES.get(device_type)
+    if not probe:
+        return None
+    kwargs = {"read_timeout": timeout} if timeout else {}
+    output = net_connect.send_command(probe["command"], **kwargs)
+    if probe["filter"]:
+        match = re.search(probe["filter"], output, flags=re.MULTILINE)
+        if not match:
+            return None
+        output = match.group(0)
+    output = output.strip()
+    if not output or "invalid" in output.lower() or "syntax error" in output.lower():
+        return None
+    return hashlib.sha256(output.encode("utf-8")).hexdigest()
+
+class ProbeState:
+    """
+    Penanda terakhir per hostname, disimpan di file JSON.
+    - should_skip(): True jika penanda sama & belum waktunya full pull paksa.
+    - Penanda baru baru dianggap sah setelah backup tersimpan (confirm),
+      supaya kegagalan commit tidak membuat perubahan terlewat.
+    """
+
+    def __init__(self, path, full_interval=3600):
+        self.path = path
+        self.full_interval = full_interval
+        self._lock = threading.Lock()
+        self._state = None
+        self._pending = {}
+
+    def should_skip(self, hostname, marker):
+        with self._lock:
+            self._load()
+            entry = self._state.get(hostname)
+            if marker is not None:
+                self._pending[hostname] = marker
+            if marker is None or not entry:
+                return False
+            # Jaring pengaman: full pull paksa secara periodik
+            if time.time() - entry.get("full_at", 0) >= self.full_interval:
+                return False
+            return entry.get("marker") == marker
+
+    def confirm(self, hostnames):
+        """Dipanggil setelah config hasil full pull tersimpan."""
+        with self._lock:
+            self._load()
+            now = time.time()
+            for hostname in hostnames:
+                marker = self._pending.pop(hostname, None)
+                if marker is not None:
+                    self._state[hostname] = {"marker": marker, "full_at": now}
+            self._save()
+
+    def _load(self):
+        if self._state is not None:
+            return
+        try:
+            with open(self.path, 'r') as f:
+                self._state = json.load(f)
+        except (OSError, ValueError):
+            self._state = {}
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump(self._state, f)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
@@ -0,0 +1,84 @@
+# Alternatif cron_script.py: proses yang hidup terus & memakai ulang sesi SSH.
+# Jalankan: python collector_daemon.py  (misal via systemd), interval lewat COLLECTOR_INTERVAL
+import os
+import signal
+import threading
+import datetime
+from backend import (
+    run_backup_fleet, load_inventory, flush_push_queue, connect_device, run_repo_maintenance,
+    due_routers, record_schedule, BACKUP_WORKERS, DEVICE_TIMEOUT, BACKUP_BATCH, BACKUP_PROBE, RUN_LOCK_FILE
+)
+from scheduler import run_lock
+from session_pool import SessionPool
+from run_log import print_result, print_maintenance
+
+INTERVAL = int(os.getenv("COLLECTOR_INTERVAL", "60"))
+SESSION_IDLE_TIMEOUT = int(os.getenv("SESSION_IDLE_TIMEOUT", "600"))
+# Batas menunggu sesi SSH yang masih dipegang task lain sebelum membuka koneksi terpisah
+SESSION_BORROW_TIMEOUT = float(os.getenv("SESSION_BORROW_TIMEOUT", "30"))
+
+STOP = threading.Event()
+
+def _handle_stop(signum, frame):
+    print(f"[DAEMON] Sinyal {signum} diterima, berhenti setelah run ini...")
+    STOP.set()
+
+def run_once(pool):
+    now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"--- [DAEMON RUN] {now} ---")
+    try:
+        # Lock yang sama dengan cron_script.py: keduanya tidak boleh commit bersamaan
+        with run_lock(RUN_LOCK_FILE) as acquired:
+            if acquired:
+                _run_locked(pool)
+            else:
+                print("[LOCKED] Run lain (cron/daemon) masih berjalan, run ini dilewati.")
+    except Exception as e:
+        print(f"[FATAL ERROR] {e}")
+    print("--------------------------\n", flush=True)
+
+def _run_locked(pool):
+    inventory = load_inventory()
+    routers = inventory['routers']
+    due = due_routers(routers)
+    if due:
+        summary = run_backup_fleet(
+            due,
+            max_workers=BACKUP_WORKERS,
+            device_timeout=DEVICE_TIMEOUT,
+            on_result=print_result,
+            batch=BACKUP_BATCH,
+            pool=pool,
+            probe=BACKUP_PROBE
+        )
+        record_schedule(summary, routers)
+        print(
+            f"[SUMMARY] {summary['total']}/{len(routers)} router dalam {summary['duration']}s | "
+            f"berubah: {summary['changed']}, tetap: {summary['unchanged']}, "
+            f"gagal: {summary['failed']}, timeout: {summary['timeout']} | "
+            f"pool: {pool.snapshot()}"
+        )
+    # Sesi untuk router yang dihapus dari inventory / lama menganggur ditutup
+    pool.evict_idle(keep={r['hostname'] for r in routers})
+    print_maintenance(run_repo_maintenance())
+
+def main():
+    signal.signal(signal.SIGTERM, _handle_stop)
+    signal.signal(signal.SIGINT, _handle_stop)
+
+    pool = SessionPool(connect_device, idle_timeout=SESSION_IDLE_TIMEOUT,
+                       borrow_timeout=SESSION_BORROW_TIMEOUT)
+    print(f"[DAEMON] Mulai, interval {INTERVAL}s, worker {BACKUP_WORKERS}", flush=True)
+    try:
+        while not STOP.is_set():
+            started = datetime.datetime.now()
+            run_once(pool)
+            elapsed = (datetime.datetime.now() - started).total_seconds()
+            STOP.wait(max(INTERVAL - elapsed, 0))
+    finally:
+        pool.close_all()
+        flush_push_queue(timeout=60)
+        print("[DAEMON] Berhenti.", flush=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import os
+import sqlite3
+import threading
+
+# Pemisah field untuk `git log --format` (tidak akan muncul di pesan commit)
+_REC = "\x1e"
+_SEP = "\x1f"
+
+class CommitIndex:
+    """
+    Index metadata commit di SQLite: (commit, hostname, timestamp, pesan).
+    - add_commit() dipanggil setiap backend membuat commit (incremental, murah).
+    - sync() mengejar commit yang dibuat di luar backend (HEAD dibandingkan dengan
+      HEAD terakhir yang ter-index; hanya rentang baru yang dibaca dari git log).
+    - Query memakai index B-tree (hostname, ts) / (ts) -> O(log n) per lookup.
+    """
+
+    def __init__(self, repo, path, suffix=".cfg", repo_lock=None):
+        self.repo = repo
+        self.path = path
+        self.suffix = suffix
+        self.repo_lock = repo_lock or threading.RLock()
+        self._lock = threading.RLock()
+        self._conn = None
+
+    # --- Koneksi & skema ---
+    def _db(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS commits (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    sha TEXT UNIQUE NOT NULL,
+                    ts INTEGER NOT NULL,
+                    author TEXT,
+                    message TEXT
+                );
+                CREATE TABLE IF NOT EXISTS commit_hosts (
+                    seq INTEGER NOT NULL,
+                    hostname TEXT NOT NULL,
+                    ts INTEGER NOT NULL,
+                    PRIMARY KEY (hostname, seq)
+                );
+                CREATE INDEX IF NOT EXISTS idx_commits_ts ON commits (ts, seq);
+                CREATE INDEX IF NOT EXISTS idx_hosts_ts ON commit_hosts (hostname, ts, seq);
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            """)
+            self._conn = conn
+        return self._conn
+
+    def _meta(self, key):
+        row = self._db().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self._db().execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    # --- Update ---
+    def _insert(self, sha, ts, author, message, hostnames):
+        db = self._db()
+        cur = db.execute(
+            "INSERT OR IGNORE INTO commits (sha, ts, author, message) VALUES (?, ?, ?, ?)",
+            (sha, ts, author, message)
+        )
+        if cur.rowcount == 0:
+            return  # sudah ter-index
+        seq = cur.lastrowid
+        db.executemany(
+            "INSERT OR IGNORE INTO commit_hosts (seq, hostname, ts) VALUES (?, ?, ?)",
+            [(seq, h, ts) for h in hostnames]
+        )
+
+    def add_commit(self, commit, hostnames, parent=None):
+        """
+        Catat commit baru. parent: HEAD sebelum commit ini; jika index tertinggal
+        (ada commit dari luar), lakukan sync penuh rentang yang belum ter-index.
+        """
+        with self._lock:
+            if self._meta("head") != parent:
+                self.sync()
+                return
+            with self._db():
+                self._insert(commit.hexsha, commit.committed_date, commit.author.name,
+                             commit.summary, hostnames)
+                self._set_meta("head", commit.hexsha)
+
+    def sync(self):
+        """Index commit yang belum tercatat (HEAD repo vs HEAD terakhir di index)."""
+        with self.repo_lock, self._lock:
+            try:
+                head = self.repo.head.commit.hexsha
+            except ValueError:
+                return  # repo kosong
+            last = self._meta("head")
+            if last == head:
+                return
+
+            rev = head
+            if last:
+                try:
+                    if self.repo.is_ancestor(last, head):
+                        rev = f"{last}..{head}"
+                except Exception:
+                    pass  # HEAD lama hilang (history ditulis ulang) -> index ulang semua (lihat bawah)
+
+            raw = self.repo.git.log(
+                rev, "--name-only", "--no-renames", "--reverse",
+                f"--format={_REC}%H{_SEP}%ct{_SEP}%an{_SEP}%s"
+            )
+            with self._db():
+                if rev == head and last:
+                    # History ditulis ulang -> buang index lama, commit yang hilang tidak boleh tersisa
+                    self._db().execute("DELETE FROM commit_hosts")
+                    self._db().execute("DELETE FROM commits")
+                for record in raw.split(_REC)[1:]:
+                    header, _, files = record.partition("\n")
+                    sha, ts, author, message = header.split(_SEP, 3)
+                    hostnames = [
+                        f[:-len(self.suffix)] for f in files.split("\n")
+                        if f.endswith(self.suffix) and "/" not in f
+                    ]
+                    self._insert(sha, int(ts), author, message, hostnames)
+                self._set_meta("head", head)
+
+    # --- Query ---
+    def history(self, hostname, limit=15, until=None):
+        """Commit yang menyentuh hostname, terbaru dulu."""
+        self.sync()
+        sql = ("SELECT c.sha, c.ts, c.message, c.author FROM commit_hosts h "
+               "JOIN commits c ON c.seq = h.seq WHERE h.hostname = ?")
+        args = [hostname]
+        if until is not None:
+            sql += " AND h.ts <= ?"
+            args.append(int(until))
+        sql += " ORDER BY h.ts DESC, h.seq DESC LIMIT ?"
+        args.append(limit)
+        with self._lock:
+            return self._db().execute(sql, args).fetchall()
+
+    def contains(self, sha):
+        """True jika commit sha ada di repo ini (menurut index)."""
+        self.sync()
+        with self._lock:
+            return self._db().execute("SELECT 1 FROM commits WHERE sha = ?", (sha,)).fetchone() is not None
+
+    def last_changes(self, hostnames=None):
+        """dict hostname -> timestamp commit terakhir (satu query untuk semua host)."""
+        self.sync()
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT hostname, MAX(ts) FROM commit_hosts GROUP BY hostname"
+            ).fetchall()
+        result = dict(rows)
+        if hostnames is not None:
+            result = {h: result[h] for h in hostnames if h in result}
+        return result
+
+    def snapshot(self, until):
+        """
+        dict hostname -> (sha, ts) commit terakhir tiap host pada/sebelum `until`
+        (timeline per host dari tabel commit_hosts, satu query untuk seluruh armada).
+        """
+        self.sync()
+        with self._lock:
+            rows = self._db().execute("""
+                SELECT hostname, sha, ts FROM (
+                    SELECT h.hostname, c.sha, h.ts, ROW_NUMBER() OVER (
+                        PARTITION BY h.hostname ORDER BY h.ts DESC, h.seq DESC
+                    ) AS rn
+                    FROM commit_hosts h JOIN commits c ON c.seq = h.seq
+                    WHERE h.ts <= ?
+                ) WHERE rn = 1
+            """, (int(until),)).fetchall()
+        return {h: (sha, ts) for h, sha, ts in rows}
+
+    def audit(self, limit=20, offset=0, hostname=None, since=None, until=None):
+        """
+        Halaman audit log (terbaru dulu) dengan filter host & rentang waktu.
+        Return: (rows, total) dengan row = (sha, ts, author, message, "host1,host2").
+        """
+        self.sync()
+        where, args = [], []
+        if hostname:
+            where.append("c.seq IN (SELECT seq FROM commit_hosts WHERE hostname = ?)")
+            args.append(hostname)
+        if since is not None:
+            where.append("c.ts >= ?")
+            args.append(int(since))
+        if until is not None:
+            where.append("c.ts <= ?")
+            args.append(int(until))
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+        with self._lock:
+            db = self._db()
+            total = db.execute(f"SELECT COUNT(*) FROM commits c {clause}", args).fetchone()[0]
+            rows = db.execute(
+                f"SELECT c.sha, c.ts, c.author, c.message, "
+                f"(SELECT group_concat(hostname, ', ') FROM commit_hosts WHERE seq = c.seq) "
+                f"FROM commits c {clause} ORDER BY c.ts DESC, c.seq DESC LIMIT ? OFFSET ?",
+                args + [limit, offset]
+            ).fetchall()
+        return rows, total
@@ -0,0 +1,181 @@
+import os
+import glob
+import time
+import zlib
+import hashlib
+import tempfile
+
+CHUNK_SIZE = 64 * 1024
+_SUFFIX = ".capture"
+
+def stream_command(net_connect, command, on_chunk, read_timeout=120, loop_delay=0.02):
+    """
+    Kirim command lewat channel SSH dan teruskan output-nya ke on_chunk(teks) sepotong
+    demi sepotong, tanpa pernah menampung seluruh output. Hasil gabungan on_chunk sama
+    dengan send_command(command): echo command di awal & prompt di akhir dibuang.
+    Hanya baris utuh yang diteruskan; baris terakhir yang belum lengkap ditahan karena
+    bisa jadi itu prompt (tanda output selesai).
+    """
+    prompt = net_connect.find_prompt().strip()
+    cmd = command.strip()
+    net_connect.write_channel(net_connect.normalize_cmd(command))
+    deadline = time.monotonic() + read_timeout
+    echoed = False
+    idle = False
+    tail = ""
+    while True:
+        data = net_connect.read_channel()
+        if not data:
+            if echoed and tail.strip() == prompt:
+                if idle:
+                    return
+                # Baca sekali lagi: pastikan bukan potongan baris config yang mirip prompt
+                idle = True
+            elif time.monotonic() > deadline:
+                raise TimeoutError(f"Output '{cmd}' tidak selesai dalam {read_timeout:.0f} detik")
+            time.sleep(loop_delay)
+            continue
+        idle = False
+        data = tail + data.replace("\x08", "")
+        if not echoed:
+            # Tunggu echo command utuh (sampai akhir barisnya); prompt sebelum echo ikut dibuang
+            pos = data.find(cmd)
+            if pos < 0 or "\n" not in data[pos:]:
+                tail = data
+                continue
+            data = data[data.index("\n", pos) + 1:]
+            echoed = True
+        lines = data.split("\n")
+        tail = lines.pop()
+        if lines:
+            on_chunk("\n".join(lines) + "\n")
+
+class CapturedConfig:
+    """
+    Config bersih yang tersimpan di file sementara, beserta sha256-nya.
+    digest sama dengan change_cache.content_hash(teks), jadi bisa langsung dicek ke
+    ChangeCache tanpa membaca ulang file. install() memindahkan file ke tujuan dengan
+    os.replace (atomik: pembaca tidak pernah melihat file setengah jadi).
+    compressed=True: file berisi zlib (CaptureWriter(compress=True)), untuk antrian job;
+    digest & size tetap dihitung dari teks config aslinya.
+    """
+
+    def __init__(self, path, digest, size, compressed=False):
+        self.path = path
+        self.digest = digest
+        self.size = size
+        self.compressed = compressed
+
+    def compress(self):
+        """Isi file sebagai blob zlib (untuk antrian job)."""
+        if self.compressed:
+            # Sudah dikompres saat capture: tinggal dibaca
+            with open(self.path, "rb") as f:
+                return f.read()
+        comp = zlib.compressobj()
+        parts = []
+        with open(self.path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                parts.append(comp.compress(chunk))
+        parts.append(comp.flush())
+        return b"".join(parts)
+
+    def install(self, dest):
+        if self.compressed:
+            raise ValueError("Capture terkompresi tidak bisa dipasang langsung, pakai capture_compressed()")
+        # fsync hanya untuk capture yang disimpan; capture "No Change" langsung dibuang
+        with open(self.path, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(self.path, dest)
+        self.path = None
+
+    def discard(self):
+        if self.path:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+class CaptureWriter:
+    """
+    Tulis config ke file sementara di `directory` sambil menormalisasi (opsional,
+    NormalizeStream) dan menghitung sha256 secara bertahap. Taruh directory di
+    filesystem yang sama dengan tujuan akhir agar install() bisa atomik.
+    Dipakai sebagai context manager: jika terjadi exception, file sementara dihapus.
+    compress=True: yang ditulis ke file adalah zlib dari output (dikompres per potong
+    saat streaming), sha256 & size tetap dari teks aslinya.
+    """
+
+    def __init__(self, directory, hostname, normalizer=None, compress=False):
+        os.makedirs(directory, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(dir=directory, prefix=f".{hostname}.", suffix=_SUFFIX)
+        os.fchmod(fd, 0o644)  # mkstemp membuat 0600; samakan dengan file config biasa
+        self._file = os.fdopen(fd, "wb")
+        self._hash = hashlib.sha256()
+        self._normalizer = normalizer
+        self._comp = zlib.compressobj() if compress else None
+        self.size = 0
+
+    def write_bytes(self, data):
+        """Tulis bytes apa adanya (tanpa normalisasi)."""
+        if data:
+            self._hash.update(data)
+            self._file.write(self._comp.compress(data) if self._comp else data)
+            self.size += len(data)
+
+    def feed(self, chunk):
+        text = self._normalizer.feed(chunk) if self._normalizer else chunk
+        self.write_bytes(text.encode("utf-8"))
+
+    def finish(self):
+        if self._normalizer:
+            self.write_bytes(self._normalizer.close().encode("utf-8"))
+        if self._comp:
+            self._file.write(self._comp.flush())
+        self._file.close()
+        return CapturedConfig(self.path, self._hash.hexdigest(), self.size, compressed=self._comp is not None)
+
+    def abort(self):
+        if not self._file.closed:
+            self._file.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+        return False
+
+def capture_text(text, directory, hostname, compress=False):
+    """CapturedConfig dari teks yang sudah bersih (jalur send_command biasa)."""
+    with CaptureWriter(directory, hostname, compress=compress) as writer:
+        writer.feed(text)
+        return writer.finish()
+
+def capture_compressed(blob, directory, hostname):
+    """CapturedConfig dari blob zlib (hasil CapturedConfig.compress()), didekompres bertahap."""
+    decomp = zlib.decompressobj()
+    with CaptureWriter(directory, hostname) as writer:
+        for start in range(0, len(blob), CHUNK_SIZE):
+            writer.write_bytes(decomp.decompress(blob[start:start + CHUNK_SIZE]))
+        writer.write_bytes(decomp.flush())
+        return writer.finish()
+
+def cleanup_captures(directory, max_age=86400):
+    """Hapus file capture yatim (proses mati sebelum install/discard) yang lebih tua dari max_age."""
+    removed = 0
+    cutoff = time.time() - max_age
+    for path in glob.glob(os.path.join(directory, f".*{_SUFFIX}")):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            pass
+    return removed
@@ -0,0 +1,195 @@
+import re
+
+# Baris yang tidak pernah dibandingkan (header/penanda, bukan konfigurasi)
+IGNORED_LINES = re.compile(
+    r"^(Building configuration|Current configuration|version |end$|boot-start-marker|boot-end-marker)"
+)
+# Blok yang tidak bisa diubah sebagian dengan aman -> delta dibatalkan, pakai full replace
+UNSAFE_PREFIXES = ("banner ", "crypto pki certificate", "certificate ", "key chain", "license ")
+# Section yang urutan isinya penting -> jika berbeda, section diganti utuh
+ORDERED_SECTIONS = ("ip access-list ", "ipv6 access-list ", "object-group ", "mac access-list ")
+# Baris top-level bernomor yang urutannya penting (ACL bernomor)
+NUMBERED_ACL = re.compile(r"^access-list (\S+) ")
+
+def _child_key(line, occurrence):
+    # Baris identik di level yang sama (misal "remark ---" di ACL) tetap jadi node terpisah:
+    # kemunculan pertama memakai teks baris sebagai kunci, berikutnya diberi nomor urut
+    return line if occurrence == 1 else f"{line}\x00{occurrence}"
+
+class Node:
+    __slots__ = ("line", "children")
+
+    def __init__(self, line):
+        self.line = line
+        self.children = {}  # kunci (lihat _child_key) -> Node, urutan sesuai config
+
+    def render(self, depth=0):
+        """Baris-baris section ini (beserta anak-anaknya) dengan indentasi asli IOS."""
+        out = [" " * depth + self.line] if self.line is not None else []
+        for child in self.children.values():
+            out.extend(child.render(depth + 1 if self.line is not None else 0))
+        return out
+
+def parse_config(text):
+    """
+    Parse config bergaya IOS (berbasis indentasi) menjadi pohon Node.
+    Root.children berisi baris top-level; sub-mode (interface, router, ...) jadi anak.
+    Baris "!" dan baris header diabaikan.
+    """
+    root = Node(None)
+    stack = [(-1, root)]
+    seen = {}  # (id parent, baris) -> jumlah kemunculan
+    for raw in text.splitlines():
+        if not raw.strip() or raw.strip() == "!":
+            continue
+        indent = len(raw) - len(raw.lstrip(" "))
+        line = raw.strip()
+        if indent == 0 and IGNORED_LINES.match(line):
+            continue
+        while stack and stack[-1][0] >= indent:
+            stack.pop()
+        parent = stack[-1][1]
+        count = seen[(id(parent), line)] = seen.get((id(parent), line), 0) + 1
+        node = Node(line)
+        parent.children[_child_key(line, count)] = node
+        stack.append((indent, node))
+    return root
+
+def _negate(line):
+    # "no X" dihapus dengan menulis "X"; baris lain dihapus dengan "no X"
+    return line[3:] if line.startswith("no ") else f"no {line}"
+
+def _is_unsafe(line):
+    return line.startswith(UNSAFE_PREFIXES)
+
+def _is_duplicate(key, node):
+    return key != node.line
+
+def diff_sections(old_text, new_text):
+    """
+    Diff level section antara dua config.
+    Return list of dict {"section", "status": added/removed/changed, "removed": [...], "added": [...]}.
+    Baris top-level tanpa sub-mode dikumpulkan dalam section "(global)".
+    """
+    old_root, new_root = parse_config(old_text), parse_config(new_text)
+    result = []
+    global_removed, global_added = [], []
+
+    for key, node in old_root.children.items():
+        if key in new_root.children:
+            continue
+        if node.children:
+            result.append({"section": node.line, "status": "removed", "removed": node.render()[1:], "added": []})
+        else:
+            global_removed.append(node.line)
+
+    for key, node in new_root.children.items():
+        old = old_root.children.get(key)
+        if old is None:
+            if node.children:
+                result.append({"section": node.line, "status": "added", "removed": [], "added": node.render()[1:]})
+            else:
+                global_added.append(node.line)
+            continue
+        old_lines, new_lines = old.render()[1:], node.render()[1:]
+        if old_lines == new_lines:
+            continue
+        old_set, new_set = set(old_lines), set(new_lines)
+        result.append({
+            "section": node.line, "status": "changed",
+            "removed": [l for l in old_lines if l not in new_set],
+            "added": [l for l in new_lines if l not in old_set],
+        })
+
+    if global_removed or global_added:
+        result.insert(0, {"section": "(global)", "status": "changed",
+                          "removed": global_removed, "added": global_added})
+    return result
+
+def _section_delta(old, new, commands, problems):
+    """Isi `commands` dengan perintah untuk mengubah anak-anak `old` menjadi `new`."""
+    for key, node in old.children.items():
+        line = node.line
+        if key not in new.children:
+            if _negate(line) in new.children:
+                continue  # kebalikannya ditulis di bagian "tambah", cukup sekali
+            if _is_unsafe(line):
+                problems.append(f"hapus blok '{line}'")
+            if _is_duplicate(key, node):
+                # "no X" akan menghapus semua salinan X, bukan hanya salinan yang hilang
+                problems.append(f"hapus baris duplikat '{line}'")
+            commands.append(_negate(line))
+
+    for key, node in new.children.items():
+        line = node.line
+        prev = old.children.get(key)
+        if prev is None:
+            if _is_unsafe(line):
+                problems.append(f"tambah blok '{line}'")
+            if _is_duplicate(key, node):
+                problems.append(f"tambah baris duplikat '{line}'")
+            commands.extend(l.strip() for l in node.render())
+            if node.children:
+                commands.append("exit")
+            continue
+        if not (prev.children or node.children):
+            continue
+        if prev.render() == node.render():
+            continue
+        if _is_unsafe(line):
+            problems.append(f"ubah blok '{line}'")
+        if line.startswith(ORDERED_SECTIONS):
+            # Urutan entry penting: hapus lalu tulis ulang section utuh
+            commands.append(_negate(line))
+            commands.extend(l.strip() for l in node.render())
+            commands.append("exit")
+            continue
+        sub = []
+        _section_delta(prev, node, sub, problems)
+        if sub:
+            commands.append(line)
+            commands.extend(sub)
+            commands.append("exit")
+
+def _split_numbered_acl(root):
+    """Keluarkan baris ACL bernomor dari root: dict nomor -> list baris (urutan asli)."""
+    groups = {}
+    for key, node in list(root.children.items()):
+        m = NUMBERED_ACL.match(node.line)
+        if m:
+            groups.setdefault(m.group(1), []).append(node.line)
+            del root.children[key]
+    return groups
+
+def compute_delta(current_text, target_text):
+    """
+    Perintah config untuk mengubah running-config (current) menjadi target.
+    Return: (commands, problems). problems tidak kosong = delta tidak aman, pakai full replace.
+    """
+    current, target = parse_config(current_text), parse_config(target_text)
+    # ACL bernomor ditangani terpisah agar urutan entry terjaga
+    old_acl, new_acl = _split_numbered_acl(current), _split_numbered_acl(target)
+
+    commands, problems = [], []
+    _section_delta(current, target, commands, problems)
+
+    # ACL bernomor yang berbeda: hapus lalu tulis ulang semua baris sesuai urutan
+    for number in sorted(set(old_acl) | set(new_acl)):
+        if old_acl.get(number) == new_acl.get(number):
+            continue
+        if number in old_acl:
+            commands.append(f"no access-list {number}")
+        commands.extend(new_acl.get(number, []))
+    return commands, problems
+
+def estimate_cost(commands, target_text, per_command=0.15, replace_fixed=20.0, transfer_bps=20000):
+    """Perkiraan durasi (detik) delta vs full replace (upload file + configure replace)."""
+    delta_bytes = sum(len(c) + 1 for c in commands)
+    full_bytes = len(target_text.encode("utf-8"))
+    return {
+        "delta_commands": len(commands),
+        "delta_bytes": delta_bytes,
+        "delta_est_seconds": round(len(commands) * per_command, 1),
+        "full_bytes": full_bytes,
+        "full_est_seconds": round(replace_fixed + full_bytes / transfer_bps, 1),
+    }
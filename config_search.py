@@ -0,0 +1,213 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+_REC = "\x1e"
+_SEP = "\x1f"
+_NULL_SHA = "0" * 40
+
+class ConfigSearch:
+    """
+    Index pencarian baris config (HEAD & history) di SQLite FTS5.
+    - Tiap blob .cfg unik di-index sekali; baris unik disimpan sekali (tabel lines) dan
+      dipetakan ke blob lewat blob_lines, jadi versi baru yang hanya mengubah sedikit
+      baris tidak menggandakan index.
+    - versions: (hostname, commit, ts, blob) setiap kali config host berubah.
+    - heads: blob terbaru per host (untuk "router mana yang MASIH punya baris ini").
+    - Tokenizer trigram: query dicocokkan sebagai substring baris (case-insensitive),
+      misal "ntp server 10.0.0.5" atau "access-list 101".
+    Update incremental seperti CommitIndex: add_commit() saat backend commit, sync()
+    mengejar commit yang dibuat di luar backend.
+    """
+
+    def __init__(self, repo, path, suffix=".cfg", repo_lock=None):
+        self.repo = repo
+        self.path = path
+        self.suffix = suffix
+        self.repo_lock = repo_lock or threading.RLock()
+        self._lock = threading.RLock()
+        self._conn = None
+
+    # --- Koneksi & skema ---
+    def _db(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS blobs (id INTEGER PRIMARY KEY, sha TEXT UNIQUE NOT NULL);
+                CREATE TABLE IF NOT EXISTS lines (id INTEGER PRIMARY KEY, text TEXT UNIQUE NOT NULL);
+                CREATE TABLE IF NOT EXISTS blob_lines (
+                    line_id INTEGER NOT NULL, blob_id INTEGER NOT NULL,
+                    PRIMARY KEY (line_id, blob_id)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS versions (
+                    hostname TEXT NOT NULL, sha TEXT NOT NULL, ts INTEGER NOT NULL, blob_id INTEGER NOT NULL,
+                    PRIMARY KEY (hostname, sha)
+                );
+                CREATE INDEX IF NOT EXISTS idx_versions_blob ON versions (blob_id, ts);
+                CREATE TABLE IF NOT EXISTS heads (hostname TEXT PRIMARY KEY, blob_id INTEGER NOT NULL);
+                CREATE INDEX IF NOT EXISTS idx_heads_blob ON heads (blob_id);
+                CREATE VIRTUAL TABLE IF NOT EXISTS lines_fts USING fts5(
+                    text, content='lines', content_rowid='id', tokenize='trigram'
+                );
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            """)
+            self._conn = conn
+        return self._conn
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+
+    def _meta(self, db, key):
+        row = db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    # --- Update ---
+    def _blob_id(self, db, blob_sha):
+        """id blob; isi blob dibaca & di-index hanya jika blob ini belum pernah dilihat."""
+        row = db.execute("SELECT id FROM blobs WHERE sha = ?", (blob_sha,)).fetchone()
+        if row:
+            return row[0]
+        blob_id = db.execute("INSERT INTO blobs (sha) VALUES (?)", (blob_sha,)).lastrowid
+        data = self.repo.odb.stream(bytes.fromhex(blob_sha)).read().decode("utf-8", "replace")
+        line_ids = set()
+        for line in data.splitlines():
+            line = line.strip()
+            if not line or line == "!":
+                continue
+            cur = db.execute("INSERT OR IGNORE INTO lines (text) VALUES (?)", (line,))
+            if cur.rowcount:
+                db.execute("INSERT INTO lines_fts (rowid, text) VALUES (?, ?)", (cur.lastrowid, line))
+                line_ids.add(cur.lastrowid)
+            else:
+                line_ids.add(db.execute("SELECT id FROM lines WHERE text = ?", (line,)).fetchone()[0])
+        db.executemany("INSERT OR IGNORE INTO blob_lines (line_id, blob_id) VALUES (?, ?)",
+                       [(line_id, blob_id) for line_id in line_ids])
+        return blob_id
+
+    def _add_version(self, db, hostname, sha, ts, blob_sha):
+        if blob_sha == _NULL_SHA:
+            db.execute("DELETE FROM heads WHERE hostname = ?", (hostname,))
+            return
+        blob_id = self._blob_id(db, blob_sha)
+        db.execute("INSERT OR IGNORE INTO versions (hostname, sha, ts, blob_id) VALUES (?, ?, ?, ?)",
+                   (hostname, sha, ts, blob_id))
+        db.execute("INSERT OR REPLACE INTO heads (hostname, blob_id) VALUES (?, ?)", (hostname, blob_id))
+
+    def add_commit(self, commit, hostnames, parent=None):
+        """
+        Index blob host yang berubah di commit baru (panggil dengan lock repo dipegang).
+        Jika index tertinggal, tidak dikejar di sini (jalur backup tetap cepat);
+        sync() di pencarian berikutnya yang mengejarnya.
+        """
+        with self._transaction() as db:
+            if self._meta(db, "head") != parent:
+                return
+            tree = commit.tree
+            for hostname in hostnames:
+                self._add_version(db, hostname, commit.hexsha, commit.committed_date,
+                                  (tree / f"{hostname}{self.suffix}").hexsha)
+            db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('head', ?)", (commit.hexsha,))
+
+    def sync(self):
+        """Index commit yang belum tercatat (hanya blob yang berubah di rentang baru)."""
+        with self.repo_lock, self._transaction() as db:
+            self._sync(db)
+
+    def _sync(self, db):
+        try:
+            head = self.repo.head.commit.hexsha
+        except ValueError:
+            return  # repo kosong
+        last = self._meta(db, "head")
+        if last == head:
+            return
+
+        rev = head
+        if last:
+            try:
+                if self.repo.is_ancestor(last, head):
+                    rev = f"{last}..{head}"
+            except Exception:
+                pass
+        if rev == head and last:
+            # History ditulis ulang -> index ulang dari awal
+            for table in ("versions", "heads", "blob_lines", "blobs", "lines"):
+                db.execute(f"DELETE FROM {table}")
+            db.execute("INSERT INTO lines_fts (lines_fts) VALUES ('delete-all')")
+
+        raw = self.repo.git.log(
+            rev, "--reverse", "--root", "--raw", "--no-renames", "--no-abbrev",
+            f"--format={_REC}%H{_SEP}%ct"
+        )
+        for record in raw.split(_REC)[1:]:
+            header, _, body = record.partition("\n")
+            sha, ts = header.split(_SEP)
+            for entry in body.splitlines():
+                # :100644 100644 <blob lama> <blob baru> M\t<file>
+                if not entry.startswith(":") or "\t" not in entry:
+                    continue
+                meta, path = entry.split("\t", 1)
+                if not path.endswith(self.suffix) or "/" in path:
+                    continue
+                self._add_version(db, path[:-len(self.suffix)], sha, int(ts), meta.split()[3])
+        db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('head', ?)", (head,))
+
+    # --- Query ---
+    def search(self, text, hostname=None, current_only=False, limit=500):
+        """
+        Baris config yang memuat `text` (substring, min. 3 karakter).
+        current_only=True: hanya pasangan (host, baris) yang masih ada di config terbaru.
+        Return: list (hostname, baris, ts pertama muncul, commit pertama muncul, masih_ada),
+        urut hostname lalu waktu.
+        """
+        self.sync()
+        match = '"' + text.replace('"', '""') + '"'
+        host_clause = " AND v.hostname = ?" if hostname else ""
+        args = [match] + ([hostname] if hostname else [])
+        head_clause = """ AND EXISTS (
+            SELECT 1 FROM heads h JOIN blob_lines b2 ON b2.blob_id = h.blob_id
+            WHERE h.hostname = v.hostname AND b2.line_id = bl.line_id
+        )""" if current_only else ""
+        with self._lock:
+            db = self._db()
+            # MIN(ts) dengan kolom sha "telanjang": SQLite mengambil sha dari baris ber-ts minimum
+            rows = db.execute(f"""
+                SELECT v.hostname, bl.line_id, MIN(v.ts), v.sha
+                FROM blob_lines bl JOIN versions v ON v.blob_id = bl.blob_id
+                WHERE bl.line_id IN (SELECT rowid FROM lines_fts WHERE lines_fts MATCH ?){host_clause}{head_clause}
+                GROUP BY v.hostname, bl.line_id
+                ORDER BY v.hostname, MIN(v.ts)
+                LIMIT ?
+            """, args + [limit]).fetchall()
+            present = set(db.execute(f"""
+                SELECT h.hostname, bl.line_id
+                FROM heads h JOIN blob_lines bl ON bl.blob_id = h.blob_id
+                WHERE bl.line_id IN (SELECT rowid FROM lines_fts WHERE lines_fts MATCH ?)
+                {host_clause.replace('v.', 'h.')}
+            """, args).fetchall())
+            ids = {line_id for _, line_id, _, _ in rows}
+            texts = dict(db.execute(
+                f"SELECT id, text FROM lines WHERE id IN ({','.join('?' * len(ids))})", list(ids)
+            ).fetchall()) if ids else {}
+        return [(h, texts[line_id], ts, sha, (h, line_id) in present) for h, line_id, ts, sha in rows]
+
+    def stats(self):
+        with self._lock:
+            db = self._db()
+            return {
+                "blobs": db.execute("SELECT COUNT(*) FROM blobs").fetchone()[0],
+                "lines": db.execute("SELECT COUNT(*) FROM lines").fetchone()[0],
+                "versions": db.execute("SELECT COUNT(*) FROM versions").fetchone()[0],
+            }
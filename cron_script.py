@@ -1,24 +1,62 @@
 # Script ini dipanggil oleh Cron Job Linux tiap menit
-from backend import run_backup_task, load_inventory
+from backend import (
+    run_backup_fleet, load_inventory, flush_push_queue, run_repo_maintenance, due_routers, record_schedule,
+    BACKUP_WORKERS, DEVICE_TIMEOUT, BACKUP_BATCH, BACKUP_PROBE, RUN_LOCK_FILE
+)
+from scheduler import run_lock
+from run_log import print_result, print_maintenance
 import datetime
 
 # Timestamp untuk log file
 now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 print(f"--- [CRON RUN] {now} ---")
 
-try:
-    inventory = load_inventory()
-    for r in inventory['routers']:
-        # Panggil fungsi backup dari backend.py
-        success, status, msg = run_backup_task(r['hostname'], r['ip'], r['device_type'])
-        
-        if status == "Changed":
-            print(f"[CHANGE] {r['hostname']}: Config Berubah -> {msg}")
-        elif status == "No Change":
-            print(f"[SKIP]   {r['hostname']}: Tidak ada perubahan.")
+def backup(due, routers):
+    # Backup paralel: SSH jalan bersamaan, Git tetap serial di backend.
+    # Mode batch: semua perubahan dalam run ini masuk ke satu commit.
+    summary = run_backup_fleet(
+        due,
+        max_workers=BACKUP_WORKERS,
+        device_timeout=DEVICE_TIMEOUT,
+        on_result=print_result,
+        batch=BACKUP_BATCH,
+        probe=BACKUP_PROBE
+    )
+    record_schedule(summary, routers)
+    print(
+        f"[SUMMARY] {summary['total']}/{len(routers)} router dalam {summary['duration']}s | "
+        f"berubah: {summary['changed']}, tetap: {summary['unchanged']}, "
+        f"gagal: {summary['failed']}, timeout: {summary['timeout']}"
+    )
+
+    # Proses cron berumur pendek: tunggu push background sebelum keluar
+    if summary['changed']:
+        push = flush_push_queue(timeout=60)
+        if push['pending']:
+            print(f"[PUSH]   Belum terkirim (lag {push['lag_seconds']}s): {push['last_error']}")
         else:
-            print(f"[ERROR]  {r['hostname']}: {msg}")
+            print(f"[PUSH]   Cloud sync OK, terakhir sukses {push['last_success']}")
+
+def run():
+    inventory = load_inventory()
+    routers = inventory['routers']
+    # Hanya router yang jadwalnya sudah tiba (lihat BACKUP_SCHEDULE di backend)
+    due = due_routers(routers)
+    if not due:
+        print(f"[SCHEDULE] Belum ada router yang jatuh tempo ({len(routers)} router).")
+    else:
+        backup(due, routers)
+
+    # Repack/gc repo backup, hanya jika object lepas/pack menumpuk atau jadwal gc penuh tiba
+    print_maintenance(run_repo_maintenance())
 
+try:
+    # Run yang lambat tidak boleh tumpang tindih dengan run menit berikutnya
+    with run_lock(RUN_LOCK_FILE) as acquired:
+        if acquired:
+            run()
+        else:
+            print("[LOCKED] Run sebelumnya masih berjalan, run ini dilewati.")
 except Exception as e:
     print(f"[FATAL ERROR] {e}")
 
@@ -2,7 +2,7 @@ import streamlit as st
 import pandas as pd
 import time
 import os
-import git
+from collections import deque
 from datetime import datetime, timedelta
 # Import semua fungsi dari backend
 from backend import (
@@ -11,8 +11,28 @@ from backend import (
     run_restore_task, 
     get_router_history, 
     add_router_to_inventory,
-    find_smart_stable_commit
+    import_routers_to_inventory,
+    find_smart_stable_commit,
+    get_last_change_times,
+    get_audit_log,
+    get_inventory_version,
+    get_repo_version,
+    iter_batch_restore,
+    plan_restore,
+    diff_router_commits,
+    get_fleet_snapshot,
+    search_configs,
+    iter_snapshot_archive,
+    snapshot_restore_targets,
+    get_schedule_summary,
+    get_push_summary,
+    BASE_DIR,
+    RESTORE_WORKERS,
+    RESTORE_WAVE_SIZE,
+    RESTORE_MAX_FAILURE_RATE
 )
+from log_tail import tail_lines, follow
+from metrics import read_events, BUCKETS, METRICS_FILE
 
 # --- KONFIGURASI HALAMAN ---
 st.set_page_config(
@@ -21,12 +41,119 @@ st.set_page_config(
     layout="wide"
 )
 
+LOG_REFRESH_SECONDS = int(os.getenv("LOG_REFRESH_SECONDS", "3"))
+
+# --- CACHE ---
+# Data dikunci dengan versi sumbernya (mtime inventory / sha HEAD repo backup),
+# jadi rerun Streamlit memakai hasil lama selama data belum berubah, dan backup/edit
+# baru langsung terlihat karena kuncinya ikut berganti. max_entries membatasi ukuran cache.
+@st.cache_data(max_entries=4, show_spinner=False)
+def cached_inventory(version):
+    return load_inventory()
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def cached_history(hostname, head):
+    return get_router_history(hostname)
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def cached_stable_commit(hostname, head):
+    commit = find_smart_stable_commit(hostname)
+    return commit.hexsha if commit else None
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def cached_last_changes(hostnames, head):
+    return get_last_change_times(list(hostnames))
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def cached_audit_log(limit, offset, hostname, since, until, head):
+    return get_audit_log(limit=limit, offset=offset, hostname=hostname, since=since, until=until)
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def cached_snapshot(at, hostnames, head):
+    return get_fleet_snapshot(at, list(hostnames))
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def cached_search(query, hostname, current_only, head):
+    return search_configs(query, hostname=hostname, current_only=current_only)
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def cached_metrics(version):
+    return read_events()
+
+def metrics_version():
+    try:
+        st_ = os.stat(METRICS_FILE)
+        return (st_.st_mtime_ns, st_.st_size)
+    except OSError:
+        return None
+
+def format_interval(seconds):
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds} dtk"
+    if seconds < 3600:
+        return f"{seconds // 60} mnt"
+    return f"{seconds / 3600:.1f} jam".replace(".0 jam", " jam")
+
+def render_config_diff(sections):
+    """Tampilkan diff per section (hasil diff_router_commits)."""
+    if not sections:
+        st.info("Tidak ada perbedaan konfigurasi.")
+        return
+    icons = {"added": "🟢", "removed": "🔴", "changed": "🟡"}
+    for sec in sections:
+        with st.expander(f"{icons.get(sec['status'], '')} {sec['section']}  (-{len(sec['removed'])} / +{len(sec['added'])})"):
+            lines = [f"- {l}" for l in sec['removed']] + [f"+ {l}" for l in sec['added']]
+            st.code("\n".join(lines), language="diff")
+
+def run_batch_restore_ui(targets, max_workers, wave_size, max_fail_pct, use_delta):
+    """Jalankan iter_batch_restore & tampilkan progres per router / per wave."""
+    progress_bar = st.progress(0)
+    done = 0
+    with st.status(f"Memulihkan {len(targets)} router...", expanded=True) as status:
+        # Hasil tampil satu per satu begitu router selesai di-restore
+        for event in iter_batch_restore(
+            targets, max_workers=max_workers, wave_size=wave_size,
+            max_failure_rate=max_fail_pct / 100,
+            mode="delta" if use_delta else "full"
+        ):
+            if event['type'] == "wave":
+                st.write(f"Wave {event['wave']}/{event['waves']} selesai: {event['failed']}/{event['total']} gagal.")
+                if event['aborted']:
+                    status.update(label="Batch restore dihentikan (ambang gagal terlewati)", state="error")
+                continue
+
+            done += 1
+            hostname = event['hostname']
+            if event['success']:
+                st.write(f"✅ {hostname} pulih ke `{event['commit'][:7]}`")
+                st.toast(f"{hostname} Pulih!", icon="✅")
+            elif event['status'] == "Skipped":
+                st.write(f"⏭️ {hostname}: {event['message']}")
+            else:
+                st.write(f"❌ {hostname}: {event['message']}")
+                st.toast(f"{hostname} Gagal: {event['message']}", icon="❌")
+            progress_bar.progress(done / max(len(targets), 1))
+
+def batch_restore_settings(default_delta=False):
+    """Pengaturan eksekusi paralel per gelombang. Return (workers, wave, gagal %, delta)."""
+    with st.expander("⚙️ Pengaturan Batch Restore"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            max_workers = st.number_input("Restore Paralel", min_value=1, max_value=50, value=RESTORE_WORKERS)
+        with col2:
+            wave_size = st.number_input("Router per Wave", min_value=1, max_value=500, value=RESTORE_WAVE_SIZE)
+        with col3:
+            max_fail_pct = st.slider("Batas Gagal per Wave (%)", 0, 100, int(RESTORE_MAX_FAILURE_RATE * 100))
+        use_delta = st.checkbox("Gunakan restore delta (fallback otomatis ke Full Replace)", value=default_delta)
+    return max_workers, wave_size, max_fail_pct, use_delta
+
 st.title("🛡️ Network Disaster Recovery Center")
 st.markdown("Sistem Otomasi Backup & Restore Hybrid (Lokal + Git Cloud)")
 
 # Load Inventory (Data Router)
 try:
-    inventory = load_inventory()
+    inventory = cached_inventory(get_inventory_version())
     routers = inventory['routers']
     router_names = [r['hostname'] for r in routers]
 except Exception as e:
@@ -41,6 +168,7 @@ menu = st.sidebar.radio(
         "⚙️ Backup Manager", 
         "🚑 Disaster Recovery", 
         "📜 Audit Logs", 
+        "🔎 Config Search",
         "➕ Add Device", 
         "🖥️ System Logs",
 	"ℹ️ Tentang Aplikasi"
@@ -53,8 +181,43 @@ if menu == "📊 Dashboard":
     
     col1, col2, col3 = st.columns(3)
     col1.metric("Total Router", len(routers))
-    col2.metric("Backup Schedule", "Every 1 Minute")
-    col3.metric("Cloud Sync", "Active (GitHub) ☁️")
+    # Jadwal dari state scheduler (ditulis cron/daemon), bukan teks tetap
+    schedule = get_schedule_summary(routers)
+    if schedule["mode"] == "adaptive":
+        lo, hi = format_interval(schedule["min_interval"]), format_interval(schedule["max_interval"])
+        if schedule["due"]:
+            next_info = f"{schedule['due']} router jatuh tempo"
+        elif schedule["next_due"]:
+            next_info = f"Berikutnya {datetime.fromtimestamp(schedule['next_due']).strftime('%H:%M:%S')}"
+        else:
+            next_info = None
+        col2.metric(
+            "Backup Schedule", f"Adaptif {lo}" if lo == hi else f"Adaptif {lo} - {hi}",
+            next_info, delta_color="off",
+            help=f"Interval per router menyesuaikan seberapa sering config-nya berubah. "
+                 f"Router flapping: {schedule['flapping']}."
+        )
+    else:
+        col2.metric("Backup Schedule", "Semua router tiap run",
+                    help="BACKUP_SCHEDULE=all: setiap run cron/daemon menarik config semua router.")
+    # Status push dari push_status.json (ditulis proses yang mem-push), bukan teks tetap
+    push = get_push_summary()
+    if push is None:
+        col3.metric("Cloud Sync", "Belum ada push",
+                    help="Belum ada status push: remote origin belum diset atau belum ada commit yang di-push.")
+    else:
+        if push["pending"]:
+            sync_value = f"Tertunda {format_interval(push['lag_seconds'])}"
+        else:
+            sync_value = "Sinkron ☁️"
+        help_text = "Lag dihitung sejak commit tertua yang belum ter-push ke origin."
+        if push["last_error"]:
+            help_text += f" Gagal beruntun: {push['consecutive_failures']}. Error terakhir: {push['last_error']}"
+        col3.metric(
+            "Cloud Sync", sync_value,
+            f"Sukses terakhir {push['last_success']}" if push["last_success"] else "Belum pernah sukses",
+            delta_color="off", help=help_text
+        )
     
     st.markdown("---")
     st.write("### 📋 Daftar Perangkat Terdaftar")
@@ -73,6 +236,43 @@ if menu == "📊 Dashboard":
     else:
         st.info("Belum ada router terdaftar. Gunakan menu 'Add Device'.")
 
+    st.markdown("---")
+    st.write("### ⏱️ Performa Run (per Fase)")
+    events = cached_metrics(metrics_version())
+    runs = sorted({e['run'] for e in events if e.get('run')}, reverse=True)
+    if not runs:
+        st.info("Belum ada data metrik. Data muncul setelah backup/restore pertama berjalan.")
+    else:
+        run_id = st.selectbox("Pilih Run", runs, index=0)
+        mdf = pd.DataFrame([e for e in events if e.get('run') == run_id])
+        run_total = mdf[mdf['operation'] == "backup_run"]['seconds'].sum()
+        devices = mdf[mdf['phase'] == "total"]
+
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Durasi Run", f"{run_total:.1f}s" if run_total else "-")
+        m2.metric("Router Diproses", devices[devices['operation'].isin(["backup", "restore"])]['host'].nunique())
+        m3.metric("Fase Error", int((mdf['outcome'] == "error").sum()))
+
+        # Ringkasan per (operasi, fase): p50/p95 menunjukkan fase mana yang paling makan waktu
+        grouped = mdf.groupby(['operation', 'phase'])['seconds']
+        table = pd.DataFrame({
+            "Jumlah": grouped.count(),
+            "p50 (s)": grouped.quantile(0.5).round(3),
+            "p95 (s)": grouped.quantile(0.95).round(3),
+            "Max (s)": grouped.max().round(3),
+            "Total (s)": grouped.sum().round(2),
+        }).sort_values("Total (s)", ascending=False)
+        st.dataframe(table, use_container_width=True)
+
+        phases = [f"{op} / {ph}" for op, ph in table.index]
+        chosen = st.selectbox("Histogram Fase", phases, index=0)
+        op, ph = chosen.split(" / ", 1)
+        values = mdf[(mdf['operation'] == op) & (mdf['phase'] == ph)]['seconds']
+        edges = [0.0] + list(BUCKETS) + [float("inf")]
+        labels = [f"≤{b}s" for b in BUCKETS] + [f">{BUCKETS[-1]}s"]
+        counts = pd.cut(values, bins=edges, labels=labels, include_lowest=True).value_counts().reindex(labels)
+        st.bar_chart(counts.rename("Jumlah"), sort=False)
+
 # === TAB 2: BACKUP MANAGER (MANUAL) ===
 elif menu == "⚙️ Backup Manager":
     st.subheader("Manajemen Backup Manual")
@@ -116,7 +316,7 @@ elif menu == "🚑 Disaster Recovery":
     # Pilihan Mode Restore
     mode_restore = st.radio(
         "Mode Pemulihan", 
-        ["🛠️ Manual (Single Router)", "🤖 Otomatis (Smart Batch Restore)"], 
+        ["🛠️ Manual (Single Router)", "🤖 Otomatis (Smart Batch Restore)", "🕒 Snapshot Waktu (Point-in-Time)"], 
         horizontal=True
     )
     st.markdown("---")
@@ -126,7 +326,7 @@ elif menu == "🚑 Disaster Recovery":
         st.info("Mode ini untuk memulihkan 1 router spesifik ke versi pilihan Anda.")
         
         target_restore = st.selectbox("Pilih Router Bermasalah", router_names)
-        history = get_router_history(target_restore)
+        history = cached_history(target_restore, get_repo_version())
         
         if not history:
             st.error("❌ Belum ada data backup untuk router ini.")
@@ -134,15 +334,53 @@ elif menu == "🚑 Disaster Recovery":
             options = {f"{item['time']} - {item['message']} ({item['short_hash']})": item['hash'] for item in history}
             selected_option = st.selectbox("Pilih Versi Backup", list(options.keys()))
             commit_hash = options[selected_option]
+            r_data = next(r for r in routers if r['hostname'] == target_restore)
+
+            # Perbedaan versi terpilih vs backup terbaru (= yang akan berubah saat restore)
+            with st.expander("🔎 Perbedaan dengan backup terbaru"):
+                if commit_hash == history[0]['hash']:
+                    st.info("Versi terpilih adalah backup terbaru.")
+                else:
+                    render_config_diff(diff_router_commits(target_restore, history[0]['hash'], commit_hash))
+
+            restore_mode = st.radio(
+                "Metode Restore",
+                ["Full Replace", "Delta (hanya perubahan)"],
+                horizontal=True,
+                help="Delta hanya mengirim baris yang berbeda; otomatis kembali ke Full Replace jika tidak aman."
+            )
+            mode = "delta" if restore_mode.startswith("Delta") else "full"
+
+            col_dry, col_exec = st.columns([1, 3])
+            with col_dry:
+                btn_dry = st.button("🔍 Dry-run (Rencana Delta)")
+            with col_exec:
+                btn_exec = st.button("🚨 EKSEKUSI RESTORE", type="primary")
+
+            if btn_dry:
+                with st.spinner("Membandingkan running-config dengan versi target..."):
+                    ok, plan = plan_restore(r_data['hostname'], r_data['ip'], r_data['device_type'], commit_hash)
+                if not ok:
+                    st.error(f"❌ Dry-run gagal: {plan}")
+                else:
+                    col1, col2, col3 = st.columns(3)
+                    col1.metric("Metode Terpilih", plan['mode'].upper())
+                    col2.metric("Estimasi Delta", f"{plan['delta_est_seconds']} s", f"{plan['delta_commands']} perintah")
+                    col3.metric("Estimasi Full Replace", f"{plan['full_est_seconds']} s", f"{plan['full_bytes']} byte")
+                    if plan['reason']:
+                        st.warning(f"Fallback ke Full Replace: {plan['reason']}")
+                    if plan['commands']:
+                        st.code("\n".join(plan['commands']), language="text")
+                    else:
+                        st.success("Running-config sudah sama dengan versi target.")
             
-            if st.button("🚨 EKSEKUSI RESTORE", type="primary"):
+            if btn_exec:
                 with st.status("Memulai prosedur pemulihan...", expanded=True) as status:
                     st.write("1. Mengambil file dari Git Archive...")
                     time.sleep(1)
                     st.write("2. Uploading config ke Router Flash...")
                     
-                    r_data = next(r for r in routers if r['hostname'] == target_restore)
-                    success, msg = run_restore_task(r_data['hostname'], r_data['ip'], r_data['device_type'], commit_hash)
+                    success, msg = run_restore_task(r_data['hostname'], r_data['ip'], r_data['device_type'], commit_hash, mode=mode)
                     
                     if success:
                         st.write("3. Applying Configuration (Atomic Replace)...")
@@ -162,27 +400,27 @@ elif menu == "🚑 Disaster Recovery":
         
         with st.spinner("Sedang memindai anomali konfigurasi..."):
             try:
-                repo = git.Repo("backups")
+                # Satu query ke index commit untuk semua router
+                last_changes = cached_last_changes(tuple(router_names), get_repo_version())
                 for r in routers:
                     hostname = r['hostname']
-                    filename = f"{hostname}.cfg"
-                    
+
                     # Cek kapan terakhir berubah
-                    try:
-                        commit = next(repo.iter_commits(paths=filename, max_count=1))
-                        last_change = datetime.fromtimestamp(commit.committed_date)
-                        diff = datetime.now() - last_change
-                        
-                        # LOGIKA SUSPECT: Berubah < 60 menit lalu
-                        is_suspect = diff < timedelta(minutes=60)
-                        
-                        if is_suspect:
-                            suspects.append(r)
-                            st.error(f"**{hostname}**: ⚠️ Konfigurasi berubah {diff.seconds//60} menit lalu (Unstable/Pantau)")
-                        else:
-                            st.success(f"**{hostname}**: ✅ Stabil sejak {diff.days} hari lalu")
-                    except:
+                    last_change = last_changes.get(hostname)
+                    if last_change is None:
                         st.info(f"**{hostname}**: Belum ada backup.")
+                        continue
+
+                    diff = datetime.now() - last_change
+
+                    # LOGIKA SUSPECT: Berubah < 60 menit lalu
+                    is_suspect = diff < timedelta(minutes=60)
+
+                    if is_suspect:
+                        suspects.append(r)
+                        st.error(f"**{hostname}**: ⚠️ Konfigurasi berubah {diff.seconds//60} menit lalu (Unstable/Pantau)")
+                    else:
+                        st.success(f"**{hostname}**: ✅ Stabil sejak {diff.days} hari lalu")
             except Exception as e:
                 st.error(f"Gagal akses Git: {e}")
 
@@ -193,49 +431,152 @@ elif menu == "🚑 Disaster Recovery":
             st.divider()
             st.write(f"Ditemukan **{len(suspects)} Router** mencurigakan.")
             
+            # Pengaturan eksekusi paralel per gelombang
+            max_workers, wave_size, max_fail_pct, use_delta = batch_restore_settings()
+
             if st.button(f"🚑 PULIHKAN {len(suspects)} ROUTER SEKALIGUS", type="primary"):
-                progress_bar = st.progress(0)
-                
-                for idx, r in enumerate(suspects):
-                    hostname = r['hostname']
-                    
-                    # Cari versi stabil pakai fungsi backend
-                    stable_commit = find_smart_stable_commit(hostname)
-                    
+                # Cari versi stabil pakai fungsi backend
+                targets = []
+                for r in suspects:
+                    stable_commit = cached_stable_commit(r['hostname'], get_repo_version())
                     if stable_commit:
-                        with st.spinner(f"Memulihkan {hostname} ke versi stabil..."):
-                            success, msg = run_restore_task(r['hostname'], r['ip'], r['device_type'], stable_commit.hexsha)
-                            if success:
-                                st.toast(f"{hostname} Pulih!", icon="✅")
-                            else:
-                                st.toast(f"{hostname} Gagal: {msg}", icon="❌")
+                        targets.append((r, stable_commit))
                     else:
-                        st.warning(f"{hostname}: Tidak ditemukan versi stabil sebelumnya.")
-                    
-                    progress_bar.progress((idx + 1) / len(suspects))
-                
+                        st.warning(f"{r['hostname']}: Tidak ditemukan versi stabil sebelumnya.")
+
+                run_batch_restore_ui(targets, max_workers, wave_size, max_fail_pct, use_delta)
                 st.success("Proses Auto-Restore Selesai.")
                 time.sleep(2)
                 st.rerun()
 
+    # --- MODE 3: SNAPSHOT ARMADA PADA WAKTU T ---
+    elif mode_restore == "🕒 Snapshot Waktu (Point-in-Time)":
+        st.info("Lihat config efektif seluruh router pada satu waktu (misal 5 menit sebelum gangguan), unduh sebagai arsip, atau pulihkan semuanya ke kondisi itu.")
+
+        col1, col2 = st.columns(2)
+        with col1:
+            snap_date = st.date_input("Tanggal", value=datetime.now().date())
+        with col2:
+            snap_time = st.time_input("Jam", value=datetime.now().time().replace(second=0, microsecond=0), step=60)
+        at = datetime.combine(snap_date, snap_time)
+
+        snapshot = cached_snapshot(at, tuple(router_names), get_repo_version())
+        ready = [row for row in snapshot if row['commit']]
+        missing = [row['hostname'] for row in snapshot if not row['commit']]
+        # Hanya informasi: backup bisa tertinggal dari device, jadi router ini tetap di-restore
+        backup_same = sum(1 for row in ready if row['unchanged'])
+
+        st.write(f"### 📸 Kondisi armada pada {at:%Y-%m-%d %H:%M}")
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Router dengan backup", len(ready))
+        col2.metric("Backup tidak berubah sejak itu", backup_same,
+                    help="Menurut backup terakhir. Perubahan di router yang belum ter-backup tidak terlihat, "
+                         "jadi router ini tetap ikut di-restore (mode delta: tanpa perintah jika memang sudah sama).")
+        col3.metric("Belum ada backup saat itu", len(missing))
+        if snapshot:
+            table = pd.DataFrame(snapshot)
+            table["unchanged"] = table["unchanged"].map({True: "Tidak", False: "Ya"})
+            st.dataframe(
+                table[["hostname", "time", "short_hash", "unchanged"]].rename(
+                    columns={"hostname": "Router", "time": "Backup Efektif", "short_hash": "Hash",
+                             "unchanged": "Backup Berubah Sejak Itu"}
+                ),
+                hide_index=True, use_container_width=True
+            )
+
+        if ready:
+            # Arsip dibangun hanya saat diminta (config dibaca langsung dari Git per router)
+            if st.button("📦 Siapkan Arsip Snapshot (.tar.gz)"):
+                with st.spinner("Menyusun arsip..."):
+                    st.session_state['snapshot_archive'] = (at, b"".join(iter_snapshot_archive(at, router_names)))
+            archive = st.session_state.get('snapshot_archive')
+            if archive and archive[0] == at:
+                st.download_button(
+                    "⬇️ Unduh Arsip", data=archive[1],
+                    file_name=f"snapshot-{at:%Y%m%d-%H%M}.tar.gz", mime="application/gzip"
+                )
+
+            st.divider()
+            # Delta dibandingkan dengan running-config live: router yang sudah sama tidak dikirimi perintah
+            max_workers, wave_size, max_fail_pct, use_delta = batch_restore_settings(default_delta=True)
+            confirm = st.checkbox(f"Saya yakin ingin mengembalikan {len(ready)} router ke kondisi {at:%Y-%m-%d %H:%M}")
+            if st.button(f"🚑 PULIHKAN {len(ready)} ROUTER KE SNAPSHOT", type="primary", disabled=not confirm):
+                targets, _ = snapshot_restore_targets(at, routers)
+                run_batch_restore_ui(targets, max_workers, wave_size, max_fail_pct, use_delta)
+                st.success("Restore ke snapshot selesai.")
+
 # === TAB 4: AUDIT LOGS ===
 elif menu == "📜 Audit Logs":
     st.subheader("Riwayat Perubahan Config (Git)")
+
+    # Filter & paginasi (query ke index commit, bukan walk history Git)
+    col1, col2, col3 = st.columns([2, 2, 1])
+    with col1:
+        filter_host = st.selectbox("Filter Router", ["(Semua)"] + router_names)
+    with col2:
+        filter_range = st.date_input("Rentang Tanggal", value=())
+    with col3:
+        page_size = st.selectbox("Per Halaman", [20, 50, 100])
+
+    since = until = None
+    if len(filter_range) == 2:
+        since = datetime.combine(filter_range[0], datetime.min.time())
+        until = datetime.combine(filter_range[1], datetime.max.time())
+
     try:
-        repo = git.Repo("backups")
-        commits = list(repo.iter_commits(max_count=20))
-        log_data = []
-        for c in commits:
-            log_data.append({
-                "Waktu": datetime.fromtimestamp(c.committed_date).strftime('%Y-%m-%d %H:%M:%S'),
-                "Pesan": c.message.strip(),
-                "Hash": c.hexsha[:7],
-                "Author": c.author.name
-            })
-        st.table(pd.DataFrame(log_data))
+        hostname = None if filter_host == "(Semua)" else filter_host
+        head = get_repo_version()
+        _, total = cached_audit_log(1, 0, hostname, since, until, head)
+        pages = max((total + page_size - 1) // page_size, 1)
+        page = st.number_input(f"Halaman (total {total} commit)", min_value=1, max_value=pages, value=1)
+
+        log_data, _ = cached_audit_log(page_size, (page - 1) * page_size, hostname, since, until, head)
+        if log_data:
+            st.table(pd.DataFrame(log_data).drop(columns=["sha"]))
+
+            # Detail perubahan per router untuk commit terpilih (vs commit sebelumnya)
+            st.write("### 🔎 Detail Perubahan")
+            commit_labels = {f"{row['Waktu']} - {row['Pesan']} ({row['Hash']})": row for row in log_data}
+            picked = commit_labels[st.selectbox("Pilih Commit", list(commit_labels.keys()))]
+            changed_hosts = [h for h in picked['Router'].split(", ") if h]
+            if not changed_hosts:
+                st.info("Commit ini tidak mengubah config router.")
+            for host in changed_hosts:
+                st.write(f"**{host}**")
+                render_config_diff(diff_router_commits(host, f"{picked['sha']}^", picked['sha']))
+        else:
+            st.info("Tidak ada commit yang cocok dengan filter.")
     except:
         st.warning("Folder backup belum di-init Git atau masih kosong.")
 
+# === TAB: PENCARIAN CONFIG ===
+elif menu == "🔎 Config Search":
+    st.subheader("Cari Baris Config di Seluruh Armada")
+    st.caption("Mencari di config terbaru & seluruh history backup (substring, tidak peka huruf besar/kecil, min. 3 karakter).")
+
+    col1, col2, col3 = st.columns([3, 2, 1])
+    with col1:
+        query = st.text_input("Cari", placeholder="misal: ntp server 10.0.0.5")
+    with col2:
+        search_host = st.selectbox("Router", ["(Semua)"] + router_names, key="search_host")
+    with col3:
+        current_only = st.checkbox("Hanya config terbaru", value=False)
+
+    if len(query.strip()) >= 3:
+        started = time.perf_counter()
+        with st.spinner("Memperbarui index & mencari..."):
+            hits = cached_search(
+                query.strip(), None if search_host == "(Semua)" else search_host,
+                current_only, get_repo_version()
+            )
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        hosts = {h['Router'] for h in hits}
+        st.write(f"**{len(hits)}** baris cocok di **{len(hosts)}** router ({elapsed_ms:.0f} ms)")
+        if hits:
+            st.dataframe(pd.DataFrame(hits).drop(columns=["sha"]), hide_index=True, use_container_width=True)
+    elif query:
+        st.info("Masukkan minimal 3 karakter.")
+
 # === TAB 5: ADD DEVICE (BARU) ===
 elif menu == "➕ Add Device":
     st.subheader("Tambah Perangkat Baru")
@@ -266,6 +607,27 @@ elif menu == "➕ Add Device":
                 else:
                     st.error(f"❌ {msg}")
 
+    # --- BULK IMPORT ---
+    st.markdown("---")
+    st.write("### 📥 Bulk Import (CSV / YAML)")
+    st.caption("CSV dengan kolom `hostname,ip,device_type`, atau YAML berisi list router. "
+               "Semua baris divalidasi dulu; jika ada yang salah, tidak ada yang disimpan.")
+
+    uploaded = st.file_uploader("Pilih file inventory", type=["csv", "yaml", "yml"])
+    if uploaded is not None and st.button("📥 Import ke Inventory", type="primary"):
+        fmt = "csv" if uploaded.name.lower().endswith(".csv") else "yaml"
+        success, msg, errors = import_routers_to_inventory(uploaded.getvalue().decode("utf-8"), fmt)
+        if success:
+            st.success(f"✅ {msg}")
+            time.sleep(1)
+            st.rerun()
+        else:
+            st.error(f"❌ {msg}")
+            for err in errors[:50]:
+                st.write(f"- {err}")
+            if len(errors) > 50:
+                st.write(f"... dan {len(errors) - 50} error lainnya")
+
 # ... (kode sebelumnya tetap sama) ...
 
 # === TAB 7: TENTANG APLIKASI (UPDATED) ===
@@ -356,20 +718,42 @@ elif menu == "🖥️ System Logs":
     st.subheader("System Logs (Real-time Cron)")
     st.caption("Menampilkan log aktivitas background (Cron Job).")
     
-    col1, col2 = st.columns([4,1])
+    # Absolut: sesi lain bisa sedang commit (GitPython chdir ke repo backup)
+    log_file = os.path.join(BASE_DIR, "logs", "cron.log")
+    if not os.path.exists(log_file):
+        st.warning("⚠️ File log belum terbentuk. Pastikan Cron Job sudah berjalan.")
+        st.stop()
+
+    col1, col2, col3 = st.columns([3, 1, 1])
+    with col1:
+        max_lines = st.select_slider("Jumlah baris", options=[100, 200, 500, 1000], value=100)
     with col2:
-        if st.button("🔄 Refresh Log"):
-            st.rerun()
+        live = st.toggle("Live", value=False, help="Ambil baris baru otomatis tiap beberapa detik.")
+    with col3:
+        reload_log = st.button("🔄 Refresh Log")
 
-    log_file = "logs/cron.log"
-    if os.path.exists(log_file):
-        with open(log_file, "r") as f:
-            lines = f.readlines()
-            # Trik: Balik urutan agar log terbaru ada di PALING ATAS
-            lines.reverse()
-            # Ambil 100 baris terakhir saja biar tidak berat
-            recent_logs = "".join(lines[:100])
-            st.code(recent_logs, language="text")
-    else:
-        st.warning("⚠️ File log belum terbentuk. Pastikan Cron Job sudah berjalan.")
+    # Hanya ekor file yang dibaca (seek dari akhir); sesudahnya cukup baris baru
+    # sejak offset terakhir yang diambil. Buffer disimpan di session_state.
+    if (reload_log or "log_buffer" not in st.session_state
+            or st.session_state.log_buffer.maxlen != max_lines):
+        lines, offset, file_id = tail_lines(log_file, max_lines)
+        st.session_state.log_buffer = deque(lines, maxlen=max_lines)
+        st.session_state.log_pos = (offset, file_id)
+
+    @st.fragment(run_every=LOG_REFRESH_SECONDS if live else None)
+    def show_log():
+        buffer = st.session_state.log_buffer
+        try:
+            lines, offset, file_id, rotated = follow(log_file, *st.session_state.log_pos)
+        except FileNotFoundError:
+            # Sedang dirotasi (file lama sudah dipindah, yang baru belum dibuat)
+            lines, rotated = [], False
+        else:
+            st.session_state.log_pos = (offset, file_id)
+        if rotated:
+            buffer.append("----- log dirotasi -----")
+        buffer.extend(lines)
+        # Log terbaru di PALING ATAS
+        st.code("\n".join(reversed(buffer)), language="text")
 
+    show_log()
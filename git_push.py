@@ -0,0 +1,182 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from metrics import timed
+
+class PushWorker:
+    """
+    Worker background untuk `git push`.
+    - request() hanya menandai ada commit baru; tidak menunggu jaringan.
+    - Beberapa request yang menumpuk digabung jadi satu push (push membawa semua commit).
+    - Gagal push akan diulang dengan backoff eksponensial.
+    - stats() melaporkan lag push & waktu sukses terakhir.
+    Remote bisa berupa bare repo lokal, jadi mudah diuji tanpa GitHub.
+    """
+
+    def __init__(self, repo, remote="origin", base_delay=2, max_delay=300,
+                 alert_after=3, on_error=None, status_file=None):
+        self.repo = repo
+        self.remote = remote
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.alert_after = alert_after
+        self.on_error = on_error
+        self.status_file = status_file
+
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stop = False
+        self._generation = 0       # naik setiap ada request baru
+        self._pushed_generation = 0
+        self._in_flight = False
+        self._oldest_pending = None
+
+        self.last_success = None
+        self.last_error = None
+        self.failures = 0          # gagal beruntun sejak sukses terakhir
+        self.pushes = 0
+        self.requests = 0
+
+    # --- API untuk producer (backup) ---
+    def has_remote(self):
+        return self.remote in self.repo.remotes
+
+    def request(self):
+        """Tandai ada commit yang perlu di-push. Return False jika remote tidak ada."""
+        if not self.has_remote():
+            return False
+        with self._cond:
+            self._generation += 1
+            self.requests += 1
+            if self._oldest_pending is None:
+                self._oldest_pending = time.time()
+            self._ensure_started()
+            self._cond.notify_all()
+        return True
+
+    def flush(self, timeout=30):
+        """Tunggu sampai semua request sudah ter-push. Return True jika tuntas."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._pushed_generation < self._generation:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stop(self, timeout=5):
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def stats(self):
+        with self._cond:
+            pending = self._pushed_generation < self._generation
+            lag = time.time() - self._oldest_pending if self._oldest_pending else 0
+            return {
+                "pending": pending,
+                "in_flight": self._in_flight,
+                "lag_seconds": round(lag, 1),
+                "last_success": _fmt_ts(self.last_success),
+                "last_error": self.last_error,
+                "consecutive_failures": self.failures,
+                "pushes": self.pushes,
+                "requests": self.requests,
+            }
+
+    # --- Worker ---
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop = False
+            self._thread = threading.Thread(target=self._run, name="git-push", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stop and self._pushed_generation >= self._generation:
+                    self._cond.wait()
+                if self._stop:
+                    return
+                # Semua request sampai titik ini ikut dalam satu push
+                target = self._generation
+                self._in_flight = True
+
+            error = self._push_once()
+
+            with self._cond:
+                self._in_flight = False
+                if error is None:
+                    self.pushes += 1
+                    self.failures = 0
+                    self.last_error = None
+                    self.last_success = time.time()
+                    self._pushed_generation = target
+                    # Jika ada request baru selama push, lag dihitung ulang dari sekarang
+                    self._oldest_pending = None if target >= self._generation else time.time()
+                    self._cond.notify_all()
+                    delay = 0
+                else:
+                    self.failures += 1
+                    self.last_error = error
+                    delay = min(self.base_delay * (2 ** (self.failures - 1)), self.max_delay)
+                failures = self.failures
+            self._write_status()
+
+            if error is not None:
+                if self.on_error and failures == self.alert_after:
+                    try:
+                        self.on_error(error, failures)
+                    except Exception:
+                        pass
+                # Backoff: tunggu sebelum mencoba lagi (bisa dibatalkan oleh stop())
+                with self._cond:
+                    if not self._stop:
+                        self._cond.wait(delay)
+
+    def _push_once(self):
+        try:
+            with timed("git_push", operation="push"):
+                infos = self.repo.remote(self.remote).push()
+                infos.raise_if_error()
+            return None
+        except Exception as e:
+            return str(e).strip() or e.__class__.__name__
+
+    def _write_status(self):
+        if not self.status_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.status_file) or ".", exist_ok=True)
+            tmp = f"{self.status_file}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump(self.stats(), f, indent=2)
+            os.replace(tmp, self.status_file)
+        except OSError:
+            pass
+
+def read_push_status(path):
+    """
+    Status push terakhir dari file status (ditulis proses mana pun yang mem-push).
+    Jika masih pending, lag ditambah umur file: lag terus naik walau worker sedang backoff.
+    Return None jika belum pernah ada push.
+    """
+    try:
+        with open(path) as f:
+            status = json.load(f)
+        age = time.time() - os.path.getmtime(path)
+    except (OSError, ValueError):
+        return None
+    if status.get("pending"):
+        status["lag_seconds"] = round(status.get("lag_seconds", 0) + max(age, 0), 1)
+    return status
+
+def _fmt_ts(ts):
+    if not ts:
+        return None
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
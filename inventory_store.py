@@ -0,0 +1,168 @@
+import csv
+import fcntl
+import io
+import ipaddress
+import os
+import re
+import tempfile
+import threading
+from contextlib import contextmanager
+import yaml
+
+_HOSTNAME_RE = re.compile(r"^[A-Za-z0-9]([A-Za-z0-9_.-]{0,252})$")
+_DEVICE_TYPE_RE = re.compile(r"^[a-z0-9_]+$")
+
+def _valid_address(value):
+    """IP (v4/v6) atau nama DNS."""
+    try:
+        ipaddress.ip_address(value)
+        return True
+    except ValueError:
+        return bool(_HOSTNAME_RE.match(value)) and not value.replace(".", "").isdigit()
+
+class InventoryStore:
+    """
+    Akses inventory.yaml dengan index hostname & IP.
+    - load(): hasil parse di-cache selama (mtime, size) file tidak berubah.
+      Hasilnya dipakai bersama, anggap read-only.
+    - add() / bulk_import(): dikunci dengan flock (aman antar proses & thread),
+      membaca ulang file terbaru, validasi O(1) lewat index, lalu tulis atomik
+      (file sementara + os.replace) sehingga tidak ada penulisan yang hilang/terpotong.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self._thread_lock = threading.Lock()
+        self._version = None
+        self._data = None
+        self.by_hostname = {}
+        self.by_ip = {}
+
+    # --- Baca ---
+    def version(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def load(self):
+        version = self.version()
+        if self._data is not None and version == self._version:
+            return self._data
+        with self._thread_lock:
+            return self._reload(version)
+
+    def _reload(self, version):
+        if version is None:
+            data = {'routers': []}
+        else:
+            with open(self.path, 'r') as f:
+                data = yaml.safe_load(f) or {}
+        data.setdefault('routers', [])
+        self.by_hostname = {r['hostname']: r for r in data['routers']}
+        self.by_ip = {r['ip']: r for r in data['routers']}
+        self._data, self._version = data, version
+        return data
+
+    # --- Tulis ---
+    @contextmanager
+    def _locked(self):
+        with self._thread_lock:
+            with open(self.lock_path, 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    # Selalu mulai dari isi file terbaru (bisa saja ditulis proses lain)
+                    self._reload(self.version())
+                    yield self._data
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write(self, data):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(prefix=".inventory_", suffix=".yaml", dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                # default_flow_style=False agar formatnya rapi (block style)
+                yaml.dump(data, f, default_flow_style=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self._reload(self.version())
+
+    def _validate(self, record, seen_hostnames, seen_ips):
+        if not isinstance(record, dict):
+            return None, "Format data router tidak valid."
+        hostname = str(record.get('hostname') or "").strip()
+        ip = str(record.get('ip') or "").strip()
+        device_type = str(record.get('device_type') or "cisco_ios").strip()
+
+        if not hostname or not ip:
+            return None, "Hostname dan IP tidak boleh kosong!"
+        if not _HOSTNAME_RE.match(hostname):
+            return None, f"Hostname '{hostname}' tidak valid."
+        if not _valid_address(ip):
+            return None, f"IP Address '{ip}' tidak valid."
+        if not _DEVICE_TYPE_RE.match(device_type):
+            return None, f"Device type '{device_type}' tidak valid."
+        if hostname in self.by_hostname or hostname in seen_hostnames:
+            return None, f"Hostname '{hostname}' sudah terdaftar!"
+        if ip in self.by_ip:
+            return None, f"IP Address '{ip}' sudah digunakan oleh {self.by_ip[ip]['hostname']}!"
+        if ip in seen_ips:
+            return None, f"IP Address '{ip}' sudah digunakan oleh {seen_ips[ip]}!"
+        return {'hostname': hostname, 'ip': ip, 'device_type': device_type}, None
+
+    def add(self, hostname, ip, device_type="cisco_ios"):
+        with self._locked() as data:
+            router, error = self._validate(
+                {'hostname': hostname, 'ip': ip, 'device_type': device_type}, set(), {}
+            )
+            if error:
+                return False, error
+            # Data ter-cache dipakai bersama pembaca -> tulis salinan baru, jangan mutasi
+            self._write(dict(data, routers=data['routers'] + [router]))
+        return True, f"Router {hostname} berhasil ditambahkan ke inventory."
+
+    def bulk_import(self, records):
+        """
+        Tambah banyak router sekaligus. Semua baris divalidasi dalam satu kali jalan;
+        jika ada satu saja yang salah, tidak ada yang ditulis.
+        Return: (sukses, pesan, list error "baris N: ...").
+        """
+        with self._locked() as data:
+            new_routers, errors = [], []
+            seen_hostnames, seen_ips = set(), {}
+            for idx, record in enumerate(records, start=1):
+                router, error = self._validate(record, seen_hostnames, seen_ips)
+                if error:
+                    errors.append(f"baris {idx}: {error}")
+                    continue
+                seen_hostnames.add(router['hostname'])
+                seen_ips[router['ip']] = router['hostname']
+                new_routers.append(router)
+
+            if errors:
+                return False, f"{len(errors)} baris tidak valid, import dibatalkan.", errors
+            if not new_routers:
+                return False, "Tidak ada data router untuk diimport.", []
+
+            self._write(dict(data, routers=data['routers'] + new_routers))
+        return True, f"{len(new_routers)} router berhasil diimport ke inventory.", []
+
+def parse_import(text, fmt):
+    """Ubah isi file import (csv / yaml) menjadi list dict router."""
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(text))
+        return [{k.strip(): (v or "").strip() for k, v in row.items() if k} for row in reader]
+    data = yaml.safe_load(text) or []
+    if isinstance(data, dict):
+        data = data.get('routers', [])
+    if not isinstance(data, list):
+        raise ValueError("Format YAML harus list router atau {'routers': [...]}")
+    return data
@@ -0,0 +1,179 @@
+import os
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+class JobQueue:
+    """
+    Antrian job backup di SQLite (satu baris per router), dipakai bersama oleh banyak
+    proses worker dan satu committer.
+    Alur state:  queued -> leased (diklaim worker, ada batas waktu lease)
+                        -> fetched (config bersih menunggu di-commit) -> done
+                 atau leased -> done langsung (Error / No Change dari probe).
+    Lease yang habis (worker mati/hang) otomatis bisa diklaim ulang; setelah
+    max_attempts kali, job ditutup sebagai Timeout.
+    Catatan: SQLite butuh file lock yang benar. Untuk worker di node lain, taruh file
+    antrian di storage bersama yang mendukung itu (bukan NFS biasa).
+    """
+
+    def __init__(self, path, max_attempts=3):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = threading.RLock()
+        self._conn = None
+
+    # --- Koneksi & skema ---
+    def _db(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    hostname TEXT PRIMARY KEY,
+                    ip TEXT NOT NULL,
+                    device_type TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    worker TEXT,
+                    lease_until REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    enqueued_at REAL,
+                    claimed_at REAL,
+                    finished_at REAL,
+                    config BLOB,
+                    status TEXT,
+                    message TEXT,
+                    reported INTEGER NOT NULL DEFAULT 1
+                );
+                CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs (state, enqueued_at);
+            """)
+            self._conn = conn
+        return self._conn
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE: kunci tulis diambil di awal, klaim antar proses tidak bentrok
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+
+    # --- Sisi committer ---
+    def enqueue(self, routers):
+        """Antrikan router (dict hostname/ip/device_type). Job yang masih berjalan tidak diganggu."""
+        now = time.time()
+        with self._transaction() as db:
+            cur = db.executemany("""
+                INSERT INTO jobs (hostname, ip, device_type, state, enqueued_at, attempts, reported)
+                VALUES (?, ?, ?, 'queued', ?, 0, 1)
+                ON CONFLICT (hostname) DO UPDATE SET
+                    ip = excluded.ip, device_type = excluded.device_type, state = 'queued',
+                    enqueued_at = excluded.enqueued_at, attempts = 0, worker = NULL,
+                    lease_until = NULL, status = NULL, message = NULL, reported = 1
+                WHERE jobs.state = 'done'
+            """, [(r['hostname'], r['ip'], r['device_type'], now) for r in routers])
+        return cur.rowcount
+
+    def prune(self, hostnames):
+        """Hapus job router yang sudah tidak ada di inventory."""
+        keep = set(hostnames)
+        with self._transaction() as db:
+            gone = [h for (h,) in db.execute("SELECT hostname FROM jobs") if h not in keep]
+            db.executemany("DELETE FROM jobs WHERE hostname = ?", [(h,) for h in gone])
+        return len(gone)
+
+    def fetched_blobs(self, limit=None):
+        """dict hostname -> config siap di-commit, masih terkompresi zlib."""
+        sql = "SELECT hostname, config FROM jobs WHERE state = 'fetched' ORDER BY finished_at"
+        with self._lock:
+            rows = self._db().execute(sql + (" LIMIT ?" if limit else ""), (limit,) if limit else ()).fetchall()
+        return dict(rows)
+
+    def finish(self, results):
+        """Tutup job hasil commit. results: dict hostname -> (status, pesan)."""
+        with self._transaction() as db:
+            db.executemany("""
+                UPDATE jobs SET state = 'done', status = ?, message = ?, config = NULL, reported = 0
+                WHERE hostname = ? AND state = 'fetched'
+            """, [(status, msg, h) for h, (status, msg) in results.items()])
+
+    def collect(self):
+        """Ambil hasil final yang belum dilaporkan (format sama dengan item run_backup_fleet)."""
+        with self._transaction() as db:
+            rows = db.execute("""
+                SELECT hostname, status, message, claimed_at, finished_at FROM jobs
+                WHERE state = 'done' AND reported = 0
+            """).fetchall()
+            db.execute("UPDATE jobs SET reported = 1 WHERE state = 'done' AND reported = 0")
+        return [{
+            "hostname": h, "success": status != "Error" and status != "Timeout",
+            "status": status, "message": msg or "",
+            "duration": round((finished or 0) - (claimed or finished or 0), 2),
+        } for h, status, msg, claimed, finished in rows]
+
+    # --- Sisi worker ---
+    def claim(self, worker, lease_seconds, limit=1):
+        """
+        Klaim sampai `limit` job (antrian baru atau lease yang sudah habis).
+        Return: list dict hostname/ip/device_type.
+        """
+        now = time.time()
+        with self._transaction() as db:
+            # Lease habis & jatah percobaan sudah terpakai -> gagal permanen
+            db.execute("""
+                UPDATE jobs SET state = 'done', status = 'Timeout', reported = 0, finished_at = ?,
+                    message = 'Lease worker habis ' || attempts || 'x (worker mati/hang)'
+                WHERE state = 'leased' AND lease_until < ? AND attempts >= ?
+            """, (now, now, self.max_attempts))
+            rows = db.execute("""
+                SELECT hostname, ip, device_type FROM jobs
+                WHERE state = 'queued' OR (state = 'leased' AND lease_until < ?)
+                ORDER BY enqueued_at LIMIT ?
+            """, (now, limit)).fetchall()
+            db.executemany("""
+                UPDATE jobs SET state = 'leased', worker = ?, lease_until = ?,
+                    claimed_at = ?, attempts = attempts + 1
+                WHERE hostname = ?
+            """, [(worker, now + lease_seconds, now, h) for h, _, _ in rows])
+        return [{"hostname": h, "ip": ip, "device_type": dt} for h, ip, dt in rows]
+
+    def submit(self, hostname, worker, blob=None, status=None, message=""):
+        """
+        Serahkan hasil worker. blob (config bersih terkompresi zlib) -> menunggu commit;
+        tanpa blob -> job selesai dengan status (misal "Error", "No Change"). Return False
+        jika lease sudah berpindah ke worker lain (hasil dibuang).
+        """
+        now = time.time()
+        with self._lock:
+            if blob is not None:
+                cur = self._db().execute("""
+                    UPDATE jobs SET state = 'fetched', config = ?, finished_at = ?, lease_until = NULL
+                    WHERE hostname = ? AND worker = ? AND state = 'leased'
+                """, (blob, now, hostname, worker))
+            else:
+                cur = self._db().execute("""
+                    UPDATE jobs SET state = 'done', status = ?, message = ?, finished_at = ?,
+                        lease_until = NULL, reported = 0
+                    WHERE hostname = ? AND worker = ? AND state = 'leased'
+                """, (status, message, now, hostname, worker))
+        return cur.rowcount == 1
+
+    # --- Status ---
+    def stats(self):
+        """Jumlah job per state."""
+        with self._lock:
+            rows = self._db().execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+        counts = {"queued": 0, "leased": 0, "fetched": 0, "done": 0}
+        counts.update(dict(rows))
+        return counts
+
+    def pending(self):
+        """Jumlah job yang belum selesai (antri, diklaim, atau menunggu commit)."""
+        stats = self.stats()
+        return stats["queued"] + stats["leased"] + stats["fetched"]
@@ -0,0 +1,54 @@
+import os
+
+BLOCK_SIZE = 8192
+
+def _file_id(st):
+    # (device, inode): berubah jika file diganti (logrotate dengan create / mv)
+    return (st.st_dev, st.st_ino)
+
+def tail_lines(path, n=100, block_size=BLOCK_SIZE):
+    """
+    Ambil n baris terakhir tanpa membaca seluruh file: baca blok dari akhir file
+    mundur sampai ditemukan cukup newline.
+    Return: (lines, offset, file_id). offset & file_id dipakai follow() berikutnya.
+    Baris terakhir yang belum diakhiri newline (sedang ditulis) tidak ikut.
+    """
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        end = st.st_size
+        data = b""
+        pos = end
+        while pos > 0 and data.count(b"\n") <= n:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+
+    # Potong baris yang belum lengkap di akhir file
+    cut = data.rfind(b"\n") + 1
+    offset = end - (len(data) - cut)
+    lines = data[:cut].decode("utf-8", errors="replace").splitlines()
+    return lines[-n:] if n else [], offset, _file_id(st)
+
+def follow(path, offset, file_id, max_bytes=1024 * 1024):
+    """
+    Baca hanya baris baru sejak offset terakhir.
+    Jika file diganti (file_id beda) atau mengecil (truncate), baca dari awal file baru.
+    max_bytes membatasi jumlah data per panggilan; sisanya diambil di panggilan berikutnya.
+    Return: (lines, offset, file_id, rotated).
+    """
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        rotated = _file_id(st) != file_id or st.st_size < offset
+        if rotated:
+            offset = 0
+        if st.st_size == offset:
+            return [], offset, _file_id(st), rotated
+        f.seek(offset)
+        data = f.read(max_bytes)
+
+    cut = data.rfind(b"\n") + 1
+    if cut == 0 and len(data) >= max_bytes:
+        cut = len(data)  # satu baris lebih panjang dari max_bytes: kirim apa adanya
+    lines = data[:cut].decode("utf-8", errors="replace").splitlines()
+    return lines, offset + cut, _file_id(st), rotated
@@ -0,0 +1,254 @@
+import os
+import json
+import time
+import fcntl
+import atexit
+import secrets
+import threading
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime
+from log_tail import tail_lines
+
+# File output metrik. PROM_FILE bisa diarahkan ke direktori textfile collector node_exporter.
+# Absolut sejak import: flush dari thread lain bisa terjadi saat GitPython sedang chdir ke repo backup.
+METRICS_FILE = os.path.abspath(os.getenv("METRICS_FILE", os.path.join("state", "metrics.jsonl")))
+METRICS_PROM_FILE = os.path.abspath(os.getenv("METRICS_PROM_FILE", os.path.join("state", "netauto.prom")))
+METRICS_MAX_BYTES = int(os.getenv("METRICS_MAX_BYTES", str(20 * 1024 * 1024)))
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+
+# Batas atas bucket histogram (detik)
+BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# Id run milik operasi yang sedang berjalan (bukan global proses): dua restore dari sesi
+# dashboard berbeda tidak saling menimpa. Thread pool harus menjalankan job lewat
+# contextvars.copy_context().run agar worker membawa id run pemanggilnya.
+_RUN_ID = contextvars.ContextVar("netauto_run_id", default=None)
+
+class _Span:
+    __slots__ = ("operation", "host", "outcome")
+
+    def __init__(self, operation, host):
+        self.operation = operation
+        self.host = host
+        self.outcome = "ok"
+
+class MetricsRecorder:
+    """
+    Pencatat durasi per fase (connect, enable, show_run, git_commit, ...) per router.
+    - track(operation, host): konteks per thread; fase di dalamnya otomatis
+      diberi label operasi & host, dan total durasinya dicatat sebagai fase "total".
+    - timed(phase): ukur satu fase; exception dicatat sebagai outcome "error" lalu diteruskan.
+    - Event ditampung di memori lalu di-flush ke JSONL (append) dan file Prometheus.
+    - Cron, daemon & dashboard berbagi satu file Prometheus: tiap flush menambahkan
+      delta proses ini ke total yang tersimpan (<prom>.totals.json, di bawah flock), jadi
+      counter & histogram tetap naik terus walau proses cron berganti tiap menit.
+    """
+
+    def __init__(self, path=METRICS_FILE, prom_path=METRICS_PROM_FILE,
+                 max_bytes=METRICS_MAX_BYTES, flush_interval=METRICS_FLUSH_INTERVAL):
+        self.path = path
+        self.prom_path = prom_path
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()  # flush dari beberapa thread ditulis bergantian
+        self._local = threading.local()
+        self._pending = []
+        # Delta sejak flush terakhir (total kumulatif ada di file totals)
+        self._hist = {}      # (operation, phase) -> [count per bucket..., +Inf, sum]
+        self._outcomes = {}  # (operation, phase, outcome) -> jumlah
+        self._last_flush = time.monotonic()
+
+    @property
+    def totals_path(self):
+        return f"{self.prom_path}.totals.json"
+
+    def start_run(self, label):
+        """
+        Tandai awal satu run (misal satu putaran cron). Event berikutnya di konteks ini
+        (thread ini & job yang di-submit dengan copy_context) membawa id ini.
+        """
+        run_id = f"{label}-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(2)}"
+        _RUN_ID.set(run_id)
+        return run_id
+
+    # --- Pencatatan ---
+    @contextmanager
+    def track(self, operation, host=None):
+        span = _Span(operation, host)
+        previous = getattr(self._local, "span", None)
+        self._local.span = span
+        started = time.monotonic()
+        try:
+            yield span
+        except BaseException:
+            span.outcome = "error"
+            raise
+        finally:
+            self._local.span = previous
+            self.record(operation, "total", time.monotonic() - started, span.outcome, host)
+            self.maybe_flush()
+
+    @contextmanager
+    def timed(self, phase, operation=None, host=None):
+        span = getattr(self._local, "span", None)
+        if span is not None:
+            operation = operation or span.operation
+            host = host or span.host
+        started = time.monotonic()
+        outcome = "ok"
+        try:
+            yield
+        except BaseException:
+            outcome = "error"
+            raise
+        finally:
+            self.record(operation or "other", phase, time.monotonic() - started, outcome, host)
+
+    def record(self, operation, phase, seconds, outcome="ok", host=None):
+        event = {
+            "ts": round(time.time(), 3), "run": _RUN_ID.get(), "operation": operation,
+            "phase": phase, "host": host, "seconds": round(seconds, 4), "outcome": outcome,
+        }
+        with self._lock:
+            self._pending.append(event)
+            hist = self._hist.setdefault((operation, phase), [0] * (len(BUCKETS) + 2))
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    hist[i] += 1
+            hist[-2] += 1          # +Inf (= count)
+            hist[-1] += seconds    # sum
+            key = (operation, phase, outcome)
+            self._outcomes[key] = self._outcomes.get(key, 0) + 1
+
+    # --- Output ---
+    def maybe_flush(self):
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            events, self._pending = self._pending, []
+            hist, self._hist = self._hist, {}
+            outcomes, self._outcomes = self._outcomes, {}
+            self._last_flush = time.monotonic()
+        try:
+            with self._io_lock:
+                if events:
+                    self._append_events(events)
+                if hist or outcomes:
+                    self._merge_prometheus(hist, outcomes)
+        except OSError as e:
+            print(f"⚠️ Gagal menulis metrik: {e}")
+
+    def _append_events(self, events):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # Rotasi sederhana agar file tidak tumbuh tanpa batas
+        if os.path.exists(self.path) and os.path.getsize(self.path) > self.max_bytes:
+            os.replace(self.path, f"{self.path}.1")
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(e) + "\n" for e in events))
+
+    def _merge_prometheus(self, hist, outcomes):
+        """Tambahkan delta ke total tersimpan lalu tulis ulang file Prometheus (antar proses di bawah flock)."""
+        os.makedirs(os.path.dirname(self.prom_path) or ".", exist_ok=True)
+        with open(f"{self.totals_path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                totals_hist, totals_outcomes = self._load_totals()
+                for key, values in hist.items():
+                    current = totals_hist.setdefault(key, [0] * (len(BUCKETS) + 2))
+                    totals_hist[key] = [a + b for a, b in zip(current, values)]
+                for key, count in outcomes.items():
+                    totals_outcomes[key] = totals_outcomes.get(key, 0) + count
+                self._write_atomic(self.totals_path, json.dumps({
+                    "hist": [[op, phase, values] for (op, phase), values in sorted(totals_hist.items())],
+                    "outcomes": [[op, phase, outcome, count]
+                                 for (op, phase, outcome), count in sorted(totals_outcomes.items())],
+                }))
+                self._write_atomic(self.prom_path, self._render_prometheus(totals_hist, totals_outcomes))
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load_totals(self):
+        try:
+            with open(self.totals_path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}, {}
+        hist = {(op, phase): values for op, phase, values in data.get("hist", [])
+                if len(values) == len(BUCKETS) + 2}  # bucket berubah -> mulai dari nol
+        outcomes = {(op, phase, outcome): count for op, phase, outcome, count in data.get("outcomes", [])}
+        return hist, outcomes
+
+    def _render_prometheus(self, hist_totals, outcome_totals):
+        lines = [
+            "# HELP netauto_phase_duration_seconds Durasi tiap fase backup/restore/notifikasi.",
+            "# TYPE netauto_phase_duration_seconds histogram",
+        ]
+        for (operation, phase), hist in sorted(hist_totals.items()):
+            labels = f'operation="{operation}",phase="{phase}"'
+            for bound, count in zip(BUCKETS, hist):
+                lines.append(f'netauto_phase_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'netauto_phase_duration_seconds_bucket{{{labels},le="+Inf"}} {hist[-2]}')
+            lines.append(f"netauto_phase_duration_seconds_sum{{{labels}}} {round(hist[-1], 4)}")
+            lines.append(f"netauto_phase_duration_seconds_count{{{labels}}} {hist[-2]}")
+        lines += [
+            "# HELP netauto_phase_total Jumlah fase per hasil (ok/error/status backup).",
+            "# TYPE netauto_phase_total counter",
+        ]
+        for (operation, phase, outcome), count in sorted(outcome_totals.items()):
+            lines.append(
+                f'netauto_phase_total{{operation="{operation}",phase="{phase}",outcome="{outcome}"}} {count}'
+            )
+        return "\n".join(lines) + "\n"
+
+    def _write_atomic(self, path, text):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+_RECORDER = None
+_RECORDER_LOCK = threading.Lock()
+
+def get_recorder():
+    """Recorder tunggal per proses (dibuat saat pertama dipakai)."""
+    global _RECORDER
+    with _RECORDER_LOCK:
+        if _RECORDER is None:
+            _RECORDER = MetricsRecorder()
+            # Event yang belum di-flush tetap tertulis saat proses (misal cron) keluar
+            atexit.register(_RECORDER.flush)
+        return _RECORDER
+
+def track(operation, host=None):
+    return get_recorder().track(operation, host)
+
+def timed(phase, operation=None, host=None):
+    return get_recorder().timed(phase, operation, host)
+
+def record_metric(operation, phase, seconds, outcome="ok", host=None):
+    get_recorder().record(operation, phase, seconds, outcome, host)
+
+def start_run(label):
+    return get_recorder().start_run(label)
+
+def flush_metrics():
+    if _RECORDER is not None:
+        _RECORDER.flush()
+
+def read_events(path=METRICS_FILE, limit=20000):
+    """Event terakhir dari file JSONL (hanya ekor file yang dibaca)."""
+    if not os.path.exists(path):
+        return []
+    lines, _, _ = tail_lines(path, limit)
+    events = []
+    for line in lines:
+        try:
+            events.append(json.loads(line))
+        except ValueError:
+            continue  # baris terpotong saat rotasi
+    return events
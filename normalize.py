@@ -0,0 +1,126 @@
+import re
+
+class RuleSet:
+    """
+    Aturan normalisasi satu vendor.
+    - command: perintah untuk mengambil config lengkap.
+    - blank: regex baris volatil (timestamp/header). Baris yang cocok dikosongkan,
+      bukan dihapus, agar hasilnya identik dengan backup lama (re.sub per baris).
+    - replace: list (regex, pengganti) untuk bagian volatil di tengah baris.
+    Semua regex dikompilasi sekali saat didaftarkan; blank digabung jadi satu alternation
+    sehingga tiap baris cukup dicek satu kali.
+    """
+
+    def __init__(self, command, blank=(), replace=()):
+        self.command = command
+        self._blank = re.compile("|".join(f"(?:{p})" for p in blank)) if blank else None
+        self._replace = tuple((re.compile(p), repl) for p, repl in replace)
+
+    def line(self, line):
+        if self._blank is not None and self._blank.match(line):
+            return ""
+        for pattern, repl in self._replace:
+            line = pattern.sub(repl, line)
+        return line
+
+    def stream(self):
+        return NormalizeStream(self)
+
+    def normalize(self, text):
+        stream = NormalizeStream(self)
+        return stream.feed(text) + stream.close()
+
+class NormalizeStream:
+    """
+    Normalisasi bertahap: feed() menerima potongan output (chunk) apa adanya dan
+    mengembalikan teks hasil untuk baris yang sudah pasti. Gabungan feed()+close()
+    sama persis dengan normalize(seluruh_teks), termasuk strip() di awal & akhir,
+    sehingga config besar tidak perlu ditampung utuh sebelum dibersihkan.
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        self._partial = ""   # potongan baris yang belum diakhiri newline
+        self._last = None    # baris berisi terakhir (ditahan: mungkin perlu rstrip)
+        self._held = []      # baris kosong setelah _last (dibuang jika ternyata di ekor)
+        self._emitted = False
+
+    def _push(self, lines):
+        out = []
+        for line in lines:
+            line = self.rules.line(line)
+            if not line.strip():
+                if self._last is not None:
+                    self._held.append(line)
+                continue  # baris kosong di awal teks ikut di-strip
+            if self._last is None:
+                line = line.lstrip()
+            else:
+                out.append(self._last)
+                out.extend(self._held)
+                self._held = []
+            self._last = line
+        return self._join(out)
+
+    def _join(self, lines):
+        if not lines:
+            return ""
+        text = "\n".join(lines)
+        if self._emitted:
+            text = "\n" + text
+        self._emitted = True
+        return text
+
+    def feed(self, chunk):
+        lines = (self._partial + chunk).split("\n")
+        self._partial = lines.pop()
+        return self._push(lines)
+
+    def close(self):
+        text = self._push([self._partial])
+        self._partial = ""
+        if self._last is not None:
+            text += self._join([self._last.rstrip()])
+            self._last = None
+        self._held = []
+        return text
+
+# Registry device_type -> RuleSet. Vendor baru cukup register_rules(...).
+RULES = {}
+
+def register_rules(device_type, command, blank=(), replace=()):
+    """Tambah / ganti aturan normalisasi untuk device_type."""
+    RULES[device_type] = RuleSet(command, blank, replace)
+    return RULES[device_type]
+
+def get_rules(device_type):
+    # device_type yang belum terdaftar memakai aturan IOS (perilaku lama)
+    return RULES.get(device_type) or RULES["cisco_ios"]
+
+def config_command(device_type):
+    return get_rules(device_type).command
+
+def normalize_config(raw, device_type="cisco_ios"):
+    """Buang/kosongkan baris volatil dari output config, sesuai vendor."""
+    return get_rules(device_type).normalize(raw)
+
+register_rules(
+    "cisco_ios", "show running-config",
+    blank=(
+        r"! Last configuration",
+        r"! NVRAM config",
+        r"! No configuration change since last restart",
+        # Dikoreksi otomatis oleh NTP, berubah-ubah tanpa ada perubahan config
+        r"ntp clock-period ",
+    ),
+)
+register_rules(
+    "mikrotik_routeros", "/export",
+    # "# 2024-01-02 10:11:12 by RouterOS 7.12" / "# jan/02/2024 10:11:12 by RouterOS 6.48"
+    blank=(r"# .* by RouterOS ",),
+)
+register_rules(
+    "juniper_junos", "show configuration",
+    # "## Last commit: 2024-01-02 10:11:12 UTC by admin" / "## Last changed: ..."
+    blank=(r"## Last (?:commit|changed):",),
+)
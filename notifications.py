@@ -1,45 +1,258 @@
 import os
-import requests
+import time
+import atexit
+import threading
+from collections import deque
 from dotenv import load_dotenv
+from metrics import timed
 
 # Load token dan ID dari file .env yang sudah kamu edit tadi
 load_dotenv()
 TG_TOKEN = os.getenv("TELEGRAM_TOKEN")
 TG_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+# Bisa diarahkan ke server lokal (stand-in Bot API) untuk pengujian
+TG_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org").rstrip("/")
 
-def send_alert(title, message, status="info"):
+# Pengaturan dispatcher (antrian) notifikasi
+TG_ASYNC = os.getenv("TELEGRAM_ASYNC", "1") == "1"
+TG_MAX_PER_MINUTE = float(os.getenv("TELEGRAM_MAX_PER_MINUTE", "20"))  # limit grup Telegram ~20/menit
+TG_DIGEST_WINDOW = float(os.getenv("TELEGRAM_DIGEST_WINDOW", "3"))     # detik mengumpulkan burst
+TG_DIGEST_MIN = int(os.getenv("TELEGRAM_DIGEST_MIN", "3"))             # >= ini digabung jadi digest
+TG_DEDUP_TTL = float(os.getenv("TELEGRAM_DEDUP_TTL", "900"))           # error sama per host diredam
+
+# Pilih Ikon berdasarkan status
+ICONS = {
+    "info": "ℹ️",
+    "warning": "⚠️",
+    "error": "❌",
+    "success": "✅"
+}
+
+def _format(title, message, status):
+    icon = ICONS.get(status, "📢")
+    # Format Pesan (Markdown)
+    return f"{icon} *{title}*\n\n{message}"
+
+class AlertDispatcher:
+    """
+    Antrian notifikasi Telegram yang berjalan di background.
+    - Memakai satu requests.Session (koneksi di-pool, tidak handshake ulang).
+    - Alert yang datang beruntun dalam digest_window digabung per judul,
+      misal "CONFIG CHANGE DETECTED (12 router)".
+    - Error yang sama untuk host yang sama hanya dikirim sekali per dedup_ttl.
+    - Pengiriman dibatasi max_per_minute (token bucket) & menghormati 429 retry_after.
+    """
+
+    def __init__(self, token, chat_id, api_url=TG_API_URL, max_per_minute=TG_MAX_PER_MINUTE,
+                 digest_window=TG_DIGEST_WINDOW, digest_min=TG_DIGEST_MIN, dedup_ttl=TG_DEDUP_TTL,
+                 timeout=5):
+        self.url = f"{api_url}/bot{token}/sendMessage"
+        self.chat_id = chat_id
+        self.digest_window = digest_window
+        self.digest_min = digest_min
+        self.dedup_ttl = dedup_ttl
+        self.timeout = timeout
+
+        # requests di-import di sini (bukan di atas modul): proses yang tidak pernah
+        # mengirim alert tidak ikut membayar biaya import-nya
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+
+        # Token bucket
+        self.rate = max_per_minute / 60.0
+        self.capacity = max(1.0, min(max_per_minute, 5.0))
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._token_lock = threading.Lock()  # worker & pengirim sinkron berbagi bucket yang sama
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._busy = False
+        self._recent_errors = {}  # (host, title, message) -> [waktu kirim, jumlah diredam]
+
+        self.sent = 0
+        self.suppressed = 0
+        self.failed = 0
+
+    # --- Producer ---
+    def submit(self, title, message, status="info", host=None):
+        if status == "error" and host:
+            message = self._dedup(host, title, message)
+            if message is None:
+                return
+        with self._cond:
+            self._queue.append((title, message, status, host))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="tg-alert", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def send_now(self, title, message, status="info", host=None, attempts=1):
+        """
+        Kirim langsung tanpa antrian/digest (mode sinkron).
+        Tetap melewati dedup error & token bucket yang sama dengan worker.
+        Return True jika terkirim (atau diredam sebagai duplikat).
+        """
+        if status == "error" and host:
+            message = self._dedup(host, title, message)
+            if message is None:
+                return True
+        self._wait_token()
+        return self._post(_format(title, message, status), attempts=attempts)
+
+    def flush(self, timeout=15):
+        """Tunggu antrian kosong. Return True jika semua sudah diproses."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._queue or self._busy:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def _dedup(self, host, title, message):
+        """Return None jika error ini duplikat, atau pesan (plus info jumlah yang diredam)."""
+        key = (host, title, message)
+        now = time.monotonic()
+        with self._cond:
+            entry = self._recent_errors.get(key)
+            if entry and now - entry[0] < self.dedup_ttl:
+                entry[1] += 1
+                self.suppressed += 1
+                return None
+            repeated = entry[1] if entry else 0
+            self._recent_errors[key] = [now, 0]
+            # Bersihkan entri lama agar dict tidak tumbuh terus
+            if len(self._recent_errors) > 1000:
+                for k, (t, _) in list(self._recent_errors.items()):
+                    if now - t >= self.dedup_ttl:
+                        del self._recent_errors[k]
+        if repeated:
+            message += f"\n_(+{repeated}x error serupa diredam)_"
+        return message
+
+    # --- Worker ---
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                self._busy = True
+            # Beri waktu burst terkumpul sebelum dikirim
+            time.sleep(self.digest_window)
+            with self._cond:
+                batch = list(self._queue)
+                self._queue.clear()
+
+            for text in self._build_messages(batch):
+                self._wait_token()
+                self._post(text)
+
+            with self._cond:
+                self._busy = bool(self._queue)
+                self._cond.notify_all()
+
+    def _build_messages(self, batch):
+        # Kelompokkan per (judul, status) dengan urutan kedatangan
+        groups = {}
+        for title, message, status, host in batch:
+            groups.setdefault((title, status), []).append((message, host))
+
+        texts = []
+        for (title, status), items in groups.items():
+            if len(items) < self.digest_min:
+                texts.extend(_format(title, message, status) for message, _ in items)
+                continue
+            hosts = [h for _, h in items if h]
+            lines = []
+            for message, host in items[:30]:
+                msg_lines = message.splitlines() or [""]
+                if host:
+                    # Untuk error, sertakan baris "Error: ..." agar digest tetap informatif
+                    detail = next((l for l in msg_lines if l.startswith("Error:")), "")
+                    lines.append(f"• `{host}` {detail}".rstrip())
+                else:
+                    lines.append(f"• {msg_lines[0]}")
+            if len(items) > 30:
+                lines.append(f"... dan {len(items) - 30} lainnya")
+            label = f"{len(hosts)} router" if hosts else f"{len(items)} pesan"
+            texts.append(_format(f"{title} ({label})", "\n".join(lines), status))
+        return texts
+
+    def _wait_token(self):
+        with self._token_lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+                self._last_refill = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                time.sleep((1 - self._tokens) / self.rate)
+
+    def _post(self, text, attempts=3):
+        data = {
+            "chat_id": self.chat_id,
+            "text": text,
+            "parse_mode": "Markdown"
+        }
+        for _ in range(attempts):
+            try:
+                with timed("telegram_post", operation="alert"):
+                    response = self.session.post(self.url, data=data, timeout=self.timeout)
+                if response.status_code == 200:
+                    self.sent += 1
+                    return True
+                if response.status_code == 429:
+                    # Telegram memberi tahu berapa detik harus menunggu
+                    try:
+                        retry_after = response.json().get("parameters", {}).get("retry_after", 5)
+                    except ValueError:
+                        retry_after = 5
+                    time.sleep(min(float(retry_after), 60))
+                    continue
+                print(f"Gagal kirim ke Telegram: {response.text}")
+                break
+            except Exception as e:
+                print(f"Error Koneksi Telegram: {e}")
+                time.sleep(1)
+        self.failed += 1
+        return False
+
+_DISPATCHER = None
+_DISPATCHER_LOCK = threading.Lock()
+
+def get_dispatcher():
+    """Dispatcher tunggal per proses (dibuat saat pertama dipakai)."""
+    global _DISPATCHER
+    with _DISPATCHER_LOCK:
+        if _DISPATCHER is None:
+            _DISPATCHER = AlertDispatcher(TG_TOKEN, TG_CHAT_ID)
+            # Pastikan antrian terkirim sebelum proses (misal cron) keluar
+            atexit.register(_DISPATCHER.flush, 30)
+        return _DISPATCHER
+
+def send_alert(title, message, status="info", host=None):
     """
     Mengirim notifikasi ke Telegram.
     Status: info, warning, error, success
+    host: hostname router terkait (dipakai untuk digest & dedup error)
     """
     # Cek apakah token sudah diisi. Jika kosong, fungsi berhenti.
     if not TG_TOKEN or not TG_CHAT_ID:
         print("⚠️ Warning: Token/Chat ID belum diset di .env")
-        return 
-
-    # Pilih Ikon berdasarkan status
-    icons = {
-        "info": "ℹ️",
-        "warning": "⚠️",
-        "error": "❌",
-        "success": "✅"
-    }
-    icon = icons.get(status, "📢")
-    
-    # Format Pesan (Markdown)
-    full_msg = f"{icon} *{title}*\n\n{message}"
-    
-    url = f"https://api.telegram.org/bot{TG_TOKEN}/sendMessage"
-    data = {
-        "chat_id": TG_CHAT_ID,
-        "text": full_msg,
-        "parse_mode": "Markdown"
-    }
-    
-    try:
-        response = requests.post(url, data=data, timeout=5)
-        # Debugging: Jika gagal kirim, print errornya di terminal
-        if response.status_code != 200:
-            print(f"Gagal kirim ke Telegram: {response.text}")
-    except Exception as e:
-        print(f"Error Koneksi Telegram: {e}")
+        return
+
+    # Dicatat sebagai fase "alert" dari operasi yang sedang berjalan (backup/restore)
+    with timed("alert"):
+        dispatcher = get_dispatcher()
+        if TG_ASYNC:
+            dispatcher.submit(title, message, status, host=host)
+        else:
+            # Mode sinkron (tanpa antrian), tetap memakai session yang di-pool & rate limit
+            dispatcher.send_now(title, message, status, host=host)
@@ -0,0 +1,144 @@
+# Mode antrian: banyak proses worker (boleh di node lain) menarik config, satu committer
+# menulis ke repo backup. Antrian = SQLite di QUEUE_FILE (lihat job_queue.py).
+#   python queue_worker.py committer            # jadwalkan + commit (satu saja per repo backup)
+#   python queue_worker.py worker --threads 10  # jalankan di tiap node yang punya akses ke router
+#   python queue_worker.py local --workers 4    # uji di satu mesin: satu putaran penuh lalu keluar
+import os
+import sys
+import time
+import socket
+import signal
+import argparse
+import datetime
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from backend import (
+    load_inventory, enqueue_backups, process_queue_job, commit_queued, record_schedule,
+    flush_push_queue, run_repo_maintenance, JOB_QUEUE, QUEUE_LEASE_SECONDS,
+    BACKUP_WORKERS, DEVICE_TIMEOUT, RUN_LOCK_FILE
+)
+from scheduler import run_lock
+from run_log import print_result, print_maintenance
+
+INTERVAL = int(os.getenv("COLLECTOR_INTERVAL", "60"))
+POLL_SECONDS = float(os.getenv("QUEUE_POLL_SECONDS", "2"))
+
+STOP = threading.Event()
+
+def _handle_stop(signum, frame):
+    print(f"[QUEUE] Sinyal {signum} diterima, berhenti...", flush=True)
+    STOP.set()
+
+# --- WORKER ---
+def run_worker(threads, once=False):
+    """
+    Tiap thread mengklaim satu job, menarik config, menyerahkannya, lalu klaim lagi.
+    once=True: berhenti saat antrian kosong (dipakai mode local).
+    """
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    print(f"[WORKER] {worker_id} mulai, {threads} thread", flush=True)
+
+    def _loop():
+        while not STOP.is_set():
+            jobs = JOB_QUEUE.claim(worker_id, QUEUE_LEASE_SECONDS)
+            if not jobs:
+                if once and not JOB_QUEUE.stats()["queued"]:
+                    return
+                STOP.wait(POLL_SECONDS)
+                continue
+            status = process_queue_job(jobs[0], worker_id, timeout=DEVICE_TIMEOUT)
+            print(f"[WORKER] {worker_id} {jobs[0]['hostname']}: {status}", flush=True)
+
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="queue") as executor:
+        for _ in range(threads):
+            executor.submit(_loop)
+    print(f"[WORKER] {worker_id} berhenti", flush=True)
+
+# --- COMMITTER ---
+def commit_round(routers):
+    """Commit hasil worker yang sudah masuk & perbarui jadwal. Return jumlah router selesai."""
+    results = commit_queued()
+    for item in results:
+        print_result(item)
+    if results:
+        record_schedule({"results": results}, routers)
+    return len(results)
+
+def run_committer(once=False, on_ready=None):
+    """
+    Satu-satunya penulis repo backup. Memegang lock run yang sama dengan cron_script.py /
+    collector_daemon.py, jadi tidak bisa berjalan bersamaan dengan keduanya.
+    on_ready: dipanggil sekali setelah job pertama diantrikan (mode local: start worker).
+    """
+    with run_lock(RUN_LOCK_FILE) as acquired:
+        if not acquired:
+            print("[LOCKED] Committer / run backup lain masih berjalan.", flush=True)
+            return 1
+        next_schedule = 0
+        routers = []
+        while not STOP.is_set():
+            if time.monotonic() >= next_schedule:
+                routers = load_inventory()['routers']
+                added = enqueue_backups(routers)
+                now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                print(f"--- [QUEUE] {now} | {added} job baru | {JOB_QUEUE.stats()} ---", flush=True)
+                next_schedule = time.monotonic() + INTERVAL
+                print_maintenance(run_repo_maintenance())
+                if on_ready:
+                    on_ready()
+                    on_ready = None
+            commit_round(routers)
+            if once and not JOB_QUEUE.pending():
+                break
+            STOP.wait(POLL_SECONDS)
+        flush_push_queue(timeout=60)
+    return 0
+
+# --- LOCAL (SATU MESIN) ---
+def run_local(workers, threads):
+    """Committer + beberapa proses worker di mesin ini, satu putaran sampai antrian habis."""
+    procs = []
+
+    def _spawn():
+        for _ in range(workers):
+            procs.append(subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), "worker", "--threads", str(threads), "--once"]
+            ))
+
+    started = time.monotonic()
+    try:
+        code = run_committer(once=True, on_ready=_spawn)
+    finally:
+        for p in procs:
+            if p.poll() is None:
+                p.terminate()
+            p.wait()
+    print(f"[QUEUE] Selesai dalam {time.monotonic() - started:.2f}s dengan {workers} proses worker", flush=True)
+    return code
+
+def main():
+    signal.signal(signal.SIGTERM, _handle_stop)
+    signal.signal(signal.SIGINT, _handle_stop)
+
+    ap = argparse.ArgumentParser(description="Backup mode antrian (worker multi-proses + satu committer)")
+    sub = ap.add_subparsers(dest="mode", required=True)
+    w = sub.add_parser("worker", help="klaim & tarik config dari antrian")
+    w.add_argument("--threads", type=int, default=BACKUP_WORKERS)
+    w.add_argument("--once", action="store_true", help="berhenti saat antrian kosong")
+    c = sub.add_parser("committer", help="jadwalkan job & commit hasil worker")
+    c.add_argument("--once", action="store_true", help="satu putaran lalu keluar")
+    l = sub.add_parser("local", help="committer + N proses worker di mesin ini (uji)")
+    l.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    l.add_argument("--threads", type=int, default=BACKUP_WORKERS)
+    args = ap.parse_args()
+
+    if args.mode == "worker":
+        run_worker(args.threads, once=args.once)
+        return 0
+    if args.mode == "committer":
+        return run_committer(once=args.once)
+    return run_local(args.workers, args.threads)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+import json
+import os
+import time
+
+# Konfigurasi repo yang membantu history panjang: commit-graph mempercepat
+# `git log` (sync index commit), gc otomatis bawaan git dimatikan karena
+# dijadwalkan sendiri di sini (tidak tiba-tiba jalan di tengah commit backup).
+REPO_CONFIG = {
+    ("core", "commitGraph"): "true",
+    ("gc", "writeCommitGraph"): "true",
+    ("gc", "auto"): "0",
+    ("fetch", "writeCommitGraph"): "true",
+}
+
+def count_objects(repo):
+    """Statistik `git count-objects -v` sebagai dict (count, size-pack, packs, ...)."""
+    stats = {}
+    for line in repo.git.count_objects("-v").splitlines():
+        key, _, value = line.partition(":")
+        try:
+            stats[key.strip()] = int(value.strip())
+        except ValueError:
+            pass
+    return stats
+
+def ensure_repo_config(repo):
+    with repo.config_writer() as cw:
+        for (section, option), value in REPO_CONFIG.items():
+            if not cw.has_option(section, option) or cw.get_value(section, option) != value:
+                cw.set_value(section, option, value)
+
+class RepoMaintenance:
+    """
+    Perawatan terjadwal repo backup (dipanggil dari cron / daemon tiap run, murah jika
+    tidak ada yang perlu dikerjakan):
+    - loose object > loose_limit  -> `git repack -d` (bungkus object lepas jadi satu pack)
+    - jumlah pack  > pack_limit   -> `git repack -a -d` (gabung semua pack)
+    - tiap full_interval detik    -> `git gc --prune` penuh + commit-graph
+    Waktu perawatan & pemeriksaan terakhir per repo disimpan di state_file (JSON).
+    Repo baru dibuka & dihitung object-nya paling sering tiap check_interval detik;
+    di antaranya run() hanya membaca state_file (run cron yang idle tetap murah).
+    """
+
+    def __init__(self, state_file, loose_limit=1000, pack_limit=20, full_interval=7 * 86400,
+                 check_interval=600):
+        self.state_file = state_file
+        self.loose_limit = loose_limit
+        self.pack_limit = pack_limit
+        self.full_interval = full_interval
+        self.check_interval = check_interval
+
+    def _load(self):
+        try:
+            with open(self.state_file) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, state):
+        os.makedirs(os.path.dirname(self.state_file) or ".", exist_ok=True)
+        tmp = f"{self.state_file}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp, self.state_file)
+
+    def plan(self, name, repo, state=None, force=False):
+        """Tindakan yang diperlukan untuk repo ini: None, "repack", "repack_all" atau "gc"."""
+        state = self._load() if state is None else state
+        last_full = state.get(name, {}).get("last_full", 0)
+        if force or time.time() - last_full >= self.full_interval:
+            return "gc"
+        stats = count_objects(repo)
+        if stats.get("packs", 0) > self.pack_limit:
+            return "repack_all"
+        if stats.get("count", 0) > self.loose_limit:
+            return "repack"
+        return None
+
+    def run(self, shards, force=False):
+        """
+        Rawat semua shard. Tiap repo dikunci dengan lock shard-nya selama repack/gc.
+        Return: list dict hasil per repo.
+        """
+        state = self._load()
+        results = []
+        now = time.time()
+        for shard in shards:
+            entry = state.get(shard.name, {})
+            if not force and now - entry.get("last_check", 0) < self.check_interval \
+                    and now - entry.get("last_full", 0) < self.full_interval:
+                continue  # baru saja diperiksa & gc penuh belum jatuh tempo
+            if shard.head_sha() is None:
+                continue  # repo belum ada / belum punya commit
+            with shard.lock:
+                before = count_objects(shard.repo)
+                action = self.plan(shard.name, shard.repo, state, force)
+                started = time.monotonic()
+                try:
+                    ensure_repo_config(shard.repo)
+                    if action == "repack":
+                        shard.repo.git.repack("-d", "-q")
+                    elif action == "repack_all":
+                        shard.repo.git.repack("-a", "-d", "-q")
+                    elif action == "gc":
+                        shard.repo.git.gc("--quiet", "--prune=2.weeks.ago")
+                        shard.repo.git.commit_graph("write", "--reachable")
+                    error = None
+                except Exception as e:
+                    error = str(e).strip()
+                after = count_objects(shard.repo) if action else before
+
+            entry = state.setdefault(shard.name, {})
+            entry["last_check"] = time.time()
+            if action and not error:
+                entry["last_run"] = time.time()
+                entry["last_action"] = action
+                if action == "gc":
+                    entry["last_full"] = time.time()
+            results.append({
+                "shard": shard.name, "action": action, "error": error,
+                "seconds": round(time.monotonic() - started, 2),
+                "loose_before": before.get("count", 0), "loose_after": after.get("count", 0),
+                "packs_before": before.get("packs", 0), "packs_after": after.get("packs", 0),
+                "size_kb": after.get("size-pack", 0) + after.get("size", 0),
+            })
+        if results:
+            self._save(state)
+        return results
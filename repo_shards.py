@@ -0,0 +1,262 @@
+import os
+import re
+import hashlib
+import threading
+from change_cache import ChangeCache
+from commit_index import CommitIndex
+from config_search import ConfigSearch
+from git_push import PushWorker
+
+_SHA = re.compile(r"^[0-9a-f]{40}")
+
+def read_head(path):
+    """
+    sha HEAD repo di path, dibaca langsung dari file .git (tanpa GitPython).
+    Return (pasti, sha): sha None jika repo belum ada / belum punya commit;
+    pasti=False jika layout tidak dikenali (pemanggil sebaiknya tanya GitPython).
+    """
+    git_dir = os.path.join(path, ".git")
+    try:
+        with open(os.path.join(git_dir, "HEAD")) as f:
+            head = f.read().strip()
+    except FileNotFoundError:
+        return True, None
+    except OSError:
+        return False, None
+    if not head.startswith("ref: "):
+        return bool(_SHA.match(head)), head or None
+    ref = head[5:]
+    try:
+        with open(os.path.join(git_dir, ref)) as f:
+            return True, f.read().strip()
+    except FileNotFoundError:
+        pass
+    except OSError:
+        return False, None
+    try:
+        with open(os.path.join(git_dir, "packed-refs")) as f:
+            for line in f:
+                sha, _, name = line.strip().partition(" ")
+                if name == ref:
+                    return True, sha
+    except FileNotFoundError:
+        pass
+    except OSError:
+        return False, None
+    return True, None  # branch belum punya commit
+
+class Shard:
+    """
+    Satu repo backup beserta perlengkapannya: lock, cache hash, index commit, index
+    pencarian config & push worker.
+    Semua akses ke repo shard ini wajib memegang shard.lock (index/object db Git tidak
+    thread-safe); shard berbeda punya lock sendiri sehingga commit antar shard bisa paralel.
+    readonly=True: repo lama yang hanya dibaca (history & restore), tidak di-commit/push.
+    Repo (dan import GitPython) baru dibuka saat atribut repo/index/... pertama diakses,
+    jadi membuat Shard tidak menyentuh disk.
+    """
+
+    def __init__(self, name, path, state_dir, on_push_error=None, readonly=False):
+        self.name = name
+        self.path = path
+        self.state_dir = state_dir
+        self.push_status_file = os.path.join(state_dir, "push_status.json")
+        self.readonly = readonly
+        self.on_push_error = on_push_error
+        self.lock = threading.RLock()
+        self._open_lock = threading.Lock()
+        self._repo = None
+
+    def _open(self):
+        with self._open_lock:
+            if self._repo is not None:
+                return
+            import git
+            os.makedirs(self.path, exist_ok=True)
+            try:
+                repo = git.Repo(self.path)
+            except Exception:
+                repo = git.Repo.init(self.path)
+
+            os.makedirs(self.state_dir, exist_ok=True)
+            self._index = CommitIndex(repo, os.path.join(self.state_dir, "commit_index.db"), repo_lock=self.lock)
+            self._search = ConfigSearch(repo, os.path.join(self.state_dir, "search_index.db"), repo_lock=self.lock)
+            self._change_cache = None
+            self._pusher = None
+            if not self.readonly:
+                self._change_cache = ChangeCache(repo, os.path.join(self.state_dir, "hash_cache.json"), repo_lock=self.lock)
+                self._pusher = PushWorker(
+                    repo, remote="origin", on_error=self.on_push_error,
+                    status_file=self.push_status_file
+                )
+            self._repo = repo
+
+    @property
+    def repo(self):
+        if self._repo is None:
+            self._open()
+        return self._repo
+
+    @property
+    def index(self):
+        if self._repo is None:
+            self._open()
+        return self._index
+
+    @property
+    def search(self):
+        if self._repo is None:
+            self._open()
+        return self._search
+
+    @property
+    def change_cache(self):
+        if self._repo is None:
+            self._open()
+        return self._change_cache
+
+    @property
+    def pusher(self):
+        if self._repo is None:
+            self._open()
+        return self._pusher
+
+    def head_sha(self):
+        # Dipanggil tiap rerun dashboard (kunci cache): baca file ref dulu, tanpa membuka repo
+        if self._repo is None:
+            known, sha = read_head(self.path)
+            if known:
+                return sha
+        return self.repo.head.commit.hexsha if self.repo.head.is_valid() else None
+
+    def has_commit(self, sha):
+        return self.index.contains(sha)
+
+def hash_resolver(count):
+    """hostname -> shard "00".."NN" berdasarkan prefix sha1 (stabil, merata)."""
+    width = len(str(count - 1))
+    def resolve(hostname):
+        return f"{int(hashlib.sha1(hostname.encode()).hexdigest()[:8], 16) % count:0{width}d}"
+    return resolve
+
+def site_resolver(pattern, default="default"):
+    """hostname -> site dari grup pertama regex (misal "jkt-core-01" -> "jkt")."""
+    regex = re.compile(pattern)
+    def resolve(hostname):
+        m = regex.match(hostname)
+        site = m.group(1).lower() if m else default
+        return re.sub(r"[^a-z0-9_-]", "_", site) or default
+    return resolve
+
+class ShardSet:
+    """
+    Kumpulan repo backup. Pemanggil cukup tanya for_host(hostname); pembagian
+    host ke repo (satu repo, per hash, atau per site) tersembunyi di sini.
+    - mode "none": satu repo di base_dir (layout lama, file state tetap di state_dir).
+    - mode "hash"/"site": repo per shard di shard_dir/<nama>, state di state_dir/shards/<nama>.
+      Repo lama (base_dir) jika ada ikut dibaca sebagai shard "legacy" readonly, jadi
+      history & restore dari sebelum sharding tetap bisa dipakai.
+    """
+
+    def __init__(self, base_dir, state_dir, mode="none", shard_dir=None, count=4,
+                 site_pattern=r"^([A-Za-z0-9]+)[-_.]", on_push_error=None):
+        # Path absolut: IndexFile.add GitPython sempat chdir ke working tree (berlaku untuk
+        # seluruh proses), sedangkan capture config menulis ke folder repo di luar lock shard
+        base_dir = os.path.abspath(base_dir)
+        state_dir = os.path.abspath(state_dir)
+        self.mode = mode
+        self.state_dir = state_dir
+        self.shard_dir = os.path.abspath(shard_dir or f"{base_dir}.d")
+        self.on_push_error = on_push_error
+        self._lock = threading.Lock()
+        self._shards = {}
+        self.legacy = None
+
+        if mode == "none":
+            self.resolve = lambda hostname: "main"
+            self._shards["main"] = Shard("main", base_dir, state_dir, on_push_error)
+            return
+
+        if mode == "hash":
+            self.resolve = hash_resolver(count)
+        elif mode == "site":
+            self.resolve = site_resolver(site_pattern)
+        else:
+            raise ValueError(f"Mode sharding tidak dikenal: {mode}")
+
+        if os.path.isdir(os.path.join(base_dir, ".git")):
+            self.legacy = Shard("legacy", base_dir, os.path.join(state_dir, "shards", "legacy"), readonly=True)
+        if mode == "hash":
+            # Daftar shard tetap: semua didaftarkan di awal (repo baru dibuat saat dipakai)
+            width = len(str(count - 1))
+            for i in range(count):
+                self._open(f"{i:0{width}d}")
+        self._scan()
+
+    def _scan(self):
+        """
+        Muat shard yang ada di disk tapi belum dikenal proses ini (mode site: site baru
+        bisa dibuat proses lain kapan saja, misal cron saat dashboard sedang jalan).
+        """
+        if self.mode == "none" or not os.path.isdir(self.shard_dir):
+            return
+        for name in sorted(os.listdir(self.shard_dir)):
+            if name not in self._shards and os.path.isdir(os.path.join(self.shard_dir, name, ".git")):
+                self._open(name)
+
+    def _open(self, name):
+        with self._lock:
+            shard = self._shards.get(name)
+            if shard is None:
+                shard = Shard(name, os.path.join(self.shard_dir, name),
+                              os.path.join(self.state_dir, "shards", name), self.on_push_error)
+                self._shards[name] = shard
+            return shard
+
+    def for_host(self, hostname):
+        """Shard tempat backup hostname disimpan (dibuat jika belum ada)."""
+        return self._shards.get(self.resolve(hostname)) or self._open(self.resolve(hostname))
+
+    def get(self, name):
+        if self.legacy is not None and name == self.legacy.name:
+            return self.legacy
+        shard = self._shards.get(name)
+        if shard is None:
+            self._scan()
+            shard = self._shards.get(name) or self._open(name)
+        return shard
+
+    def host_shards(self, hostname):
+        """Repo yang bisa memuat history hostname: shard-nya sendiri (+ legacy)."""
+        shard = self.for_host(hostname)
+        return [shard, self.legacy] if self.legacy else [shard]
+
+    def writable(self):
+        self._scan()
+        with self._lock:
+            return list(self._shards.values())
+
+    def readable(self):
+        """Semua shard untuk query (termasuk repo legacy)."""
+        shards = self.writable()
+        return shards + [self.legacy] if self.legacy else shards
+
+    def for_commit(self, hostname, rev):
+        """
+        Shard yang memuat commit rev untuk hostname (shard host dulu, lalu legacy).
+        rev berupa sha (boleh diikuti "^"/"~N"); ref lain seperti "HEAD" -> shard host.
+        """
+        shard = self.for_host(hostname)
+        m = _SHA.match(rev or "")
+        if self.legacy is None or not m or shard.has_commit(m.group(0)):
+            return shard
+        if self.legacy.has_commit(m.group(0)):
+            return self.legacy
+        return shard
+
+    def group(self, hostnames):
+        """dict Shard -> list hostname."""
+        groups = {}
+        for hostname in hostnames:
+            groups.setdefault(self.for_host(hostname), []).append(hostname)
+        return groups
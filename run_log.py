@@ -0,0 +1,24 @@
+# Format log console bersama untuk entry point backup (cron_script, collector_daemon, queue_worker)
+
+def print_result(item):
+    # Dipanggil setiap ada router yang selesai (urutan sesuai yang duluan selesai)
+    if item['status'] == "Changed":
+        print(f"[CHANGE] {item['hostname']}: Config Berubah -> {item['message']}")
+    elif item['status'] == "No Change":
+        print(f"[SKIP]   {item['hostname']}: Tidak ada perubahan.")
+    elif item['status'] == "Timeout":
+        print(f"[TIMEOUT] {item['hostname']}: {item['message']}")
+    else:
+        print(f"[ERROR]  {item['hostname']}: {item['message']}")
+
+def print_maintenance(results):
+    # Hasil run_repo_maintenance(); shard yang tidak dirawat tidak dicetak
+    for item in results:
+        if item['error']:
+            print(f"[MAINT]  {item['shard']}: {item['action']} gagal -> {item['error']}")
+        elif item['action']:
+            print(
+                f"[MAINT]  {item['shard']}: {item['action']} {item['seconds']}s | "
+                f"loose {item['loose_before']} -> {item['loose_after']}, "
+                f"pack {item['packs_before']} -> {item['packs_after']}, {item['size_kb']} KB"
+            )
@@ -0,0 +1,146 @@
+import fcntl
+import json
+import os
+import random
+import time
+from contextlib import contextmanager
+
+@contextmanager
+def run_lock(path):
+    """
+    Lock antar proses (flock non-blocking) agar run backup tidak tumpang tindih.
+    yield True jika lock didapat, False jika run lain masih berjalan.
+    Lock otomatis lepas saat proses mati, jadi tidak ada lock basi.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            lock_file.truncate(0)
+            lock_file.write(f"{os.getpid()}\n")
+            lock_file.flush()
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+class BackupScheduler:
+    """
+    Jadwal backup adaptif per router, disimpan di file JSON antar run.
+    - Router baru / belum pernah dijadwalkan: langsung due.
+    - "Changed": interval kembali ke min_interval.
+    - "No Change": interval dikali backoff sampai max_interval (router yang lama
+      tidak berubah makin jarang ditarik).
+    - Flapping (>= flap_threshold perubahan dalam flap_window): interval ditahan di
+      min_interval walau run terakhir tidak berubah.
+    - Error/Timeout: coba lagi dengan backoff eksponensial dari min_interval.
+    - next_due diberi jitter acak (+-jitter) agar router tidak menumpuk di menit yang sama.
+    """
+
+    def __init__(self, path, min_interval=60, max_interval=900, backoff=2.0,
+                 flap_window=3600, flap_threshold=3, jitter=0.2):
+        self.path = path
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.flap_window = flap_window
+        self.flap_threshold = flap_threshold
+        self.jitter = jitter
+        self._state = None
+
+    # --- State ---
+    def _load(self):
+        if self._state is None:
+            try:
+                with open(self.path) as f:
+                    self._state = json.load(f)
+            except (OSError, ValueError):
+                self._state = {}
+        return self._state
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._state, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def _jittered(self, interval):
+        return interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    # --- API ---
+    def due(self, routers, now=None):
+        """Router yang sudah waktunya di-backup (yang paling lama terlambat duluan)."""
+        now = now or time.time()
+        state = self._load()
+        due = [r for r in routers if state.get(r['hostname'], {}).get("next_due", 0) <= now]
+        due.sort(key=lambda r: state.get(r['hostname'], {}).get("next_due", 0))
+        return due
+
+    def update(self, results, hostnames=None, now=None):
+        """
+        Hitung jadwal berikutnya dari hasil run_backup_fleet (list dict hostname/status).
+        hostnames: daftar router di inventory; entri router yang sudah dihapus dibuang.
+        """
+        now = now or time.time()
+        state = self._load()
+        for item in results:
+            entry = state.setdefault(item['hostname'], {"interval": self.min_interval, "changes": []})
+            status = item['status']
+            entry["last_run"] = round(now)
+            entry["last_status"] = status
+            entry["changes"] = [t for t in entry.get("changes", []) if now - t < self.flap_window]
+
+            if status in ("Error", "Timeout"):
+                entry["failures"] = entry.get("failures", 0) + 1
+                interval = min(self.min_interval * 2 ** (entry["failures"] - 1), self.max_interval)
+            else:
+                entry["failures"] = 0
+                if status == "Changed":
+                    entry["changes"].append(round(now))
+                    entry["last_change"] = round(now)
+                    interval = self.min_interval
+                elif len(entry["changes"]) >= self.flap_threshold:
+                    interval = self.min_interval
+                else:
+                    interval = min(entry.get("interval", self.min_interval) * self.backoff, self.max_interval)
+                entry["interval"] = interval
+            entry["flapping"] = len(entry["changes"]) >= self.flap_threshold
+            entry["next_due"] = round(now + self._jittered(interval), 1)
+
+        if hostnames is not None:
+            keep = set(hostnames)
+            for hostname in [h for h in state if h not in keep]:
+                del state[hostname]
+        self._save()
+
+    def snapshot(self):
+        """Salinan state (untuk ditampilkan / debug)."""
+        return {h: dict(v) for h, v in self._load().items()}
+
+    def summary(self, hostnames, now=None):
+        """
+        Ringkasan jadwal untuk dashboard: jumlah router jatuh tempo, next_due terdekat,
+        rentang interval yang sedang berlaku & jumlah router flapping.
+        State dibaca ulang dari file (ditulis proses cron/daemon), cache proses ini tidak disentuh.
+        """
+        now = now or time.time()
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+        entries = [state.get(h, {}) for h in hostnames]
+        upcoming = [e["next_due"] for e in entries if e.get("next_due", 0) > now]
+        intervals = [e["interval"] for e in entries if e.get("interval")]
+        return {
+            "total": len(entries),
+            "due": len(entries) - len(upcoming),
+            "next_due": min(upcoming) if upcoming else None,
+            "min_interval": min(intervals) if intervals else self.min_interval,
+            "max_interval": max(intervals) if intervals else self.max_interval,
+            "flapping": sum(1 for e in entries if e.get("flapping")),
+        }
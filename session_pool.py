@@ -0,0 +1,156 @@
+import threading
+import time
+from contextlib import contextmanager
+
+class _Session:
+    def __init__(self, params, conn):
+        self.params = params
+        self.conn = conn
+        self.lock = threading.Lock()   # satu sesi SSH hanya dipakai satu task sekaligus
+        self.last_used = time.monotonic()
+        self.last_checked = time.monotonic()
+        self.uses = 0
+
+class SessionPool:
+    """
+    Pool sesi SSH (Netmiko) yang sudah login & enable, dikunci per hostname.
+    - borrow(): pinjam sesi; dibuat baru jika belum ada / mati / parameter berubah.
+    - Health check (is_alive) dilakukan jika sesi menganggur > health_interval.
+    - Jika terjadi error saat dipinjam, sesi dibuang & koneksi ulang di pemakaian berikutnya.
+    - evict_idle(): tutup sesi yang menganggur > idle_timeout.
+    - Sesi yang masih dipegang task lain (misal task yang macet melewati batas waktu run)
+      ditunggu paling lama borrow_timeout; setelah itu dipakai koneksi sekali pakai
+      di luar pool ("overflow") agar task ini tidak ikut tertahan.
+    """
+
+    def __init__(self, connect, idle_timeout=600, health_interval=15, borrow_timeout=30):
+        # connect(params) -> koneksi netmiko yang sudah enable()
+        self.connect = connect
+        self.idle_timeout = idle_timeout
+        self.health_interval = health_interval
+        self.borrow_timeout = borrow_timeout
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self.stats = {"opened": 0, "reused": 0, "reconnects": 0, "evicted": 0, "overflow": 0}
+
+    def _count(self, key, amount=1):
+        # stats diubah dari banyak thread worker sekaligus
+        with self._lock:
+            self.stats[key] += amount
+
+    @contextmanager
+    def borrow(self, hostname, params, timeout=None):
+        with self._lock:
+            session = self._sessions.get(hostname)
+            if session is None:
+                session = _Session(params, None)
+                self._sessions[hostname] = session
+
+        timeout = self.borrow_timeout if timeout is None else timeout
+        if not session.lock.acquire(timeout=timeout):
+            self._count("overflow")
+            with self._overflow(params) as conn:
+                yield conn
+            return
+
+        try:
+            if session.conn is not None and session.params != params:
+                # IP / device_type berubah di inventory
+                self._close(session)
+            if session.conn is not None and not self._healthy(session):
+                self._close(session)
+                self._count("reconnects")
+
+            if session.conn is None:
+                session.params = params
+                session.conn = self.connect(params)
+                self._count("opened")
+            else:
+                self._count("reused")
+
+            try:
+                yield session.conn
+            except Exception:
+                # Sesi mungkin rusak (timeout di tengah command, dsb) -> jangan dipakai lagi
+                self._close(session)
+                raise
+            finally:
+                session.last_used = time.monotonic()
+                session.uses += 1
+        finally:
+            session.lock.release()
+
+    @contextmanager
+    def _overflow(self, params):
+        """Koneksi sekali pakai saat sesi pool untuk host ini tidak kunjung dilepas."""
+        conn = self.connect(params)
+        try:
+            yield conn
+        finally:
+            try:
+                conn.disconnect()
+            except Exception:
+                pass
+
+    def _healthy(self, session):
+        now = time.monotonic()
+        if now - session.last_used < self.health_interval:
+            return True
+        try:
+            alive = session.conn.is_alive()
+        except Exception:
+            alive = False
+        session.last_checked = now
+        return alive
+
+    def _close(self, session):
+        conn, session.conn = session.conn, None
+        if conn is not None:
+            try:
+                conn.disconnect()
+            except Exception:
+                pass
+
+    def evict_idle(self, keep=None):
+        """Tutup sesi menganggur & sesi untuk host yang tidak ada di `keep` (jika diberikan)."""
+        now = time.monotonic()
+        with self._lock:
+            items = list(self._sessions.items())
+        evicted = 0
+        for hostname, session in items:
+            removed = keep is not None and hostname not in keep
+            if not removed and now - session.last_used < self.idle_timeout:
+                continue
+            # Sesi yang sedang dipakai dilewati, dicoba lagi di putaran berikutnya
+            if not session.lock.acquire(blocking=False):
+                continue
+            try:
+                if session.conn is not None:
+                    self._close(session)
+                    evicted += 1
+                if removed:
+                    with self._lock:
+                        self._sessions.pop(hostname, None)
+            finally:
+                session.lock.release()
+        self._count("evicted", evicted)
+        return evicted
+
+    def close_all(self):
+        with self._lock:
+            items = list(self._sessions.values())
+            self._sessions.clear()
+        for session in items:
+            # Sesi yang masih macet dipakai dilewati (ikut tertutup saat proses keluar)
+            if not session.lock.acquire(timeout=self.borrow_timeout):
+                continue
+            try:
+                self._close(session)
+            finally:
+                session.lock.release()
+
+    def snapshot(self):
+        """Ringkasan isi pool (untuk log daemon)."""
+        with self._lock:
+            active = sum(1 for s in self._sessions.values() if s.conn is not None)
+            return dict(self.stats, active=active, hosts=len(self._sessions))
@@ -0,0 +1,153 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import subprocess
+import unittest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(ROOT_DIR, "benchmarks")
+sys.path[:0] = [BENCH_DIR, ROOT_DIR]
+
+from synth_repo import build_workspace
+
+# Router pertama baru menjawab setelah batas waktu run (device_timeout 1 + kelonggaran 5 detik)
+_LATE_RUN = f"""
+import sys, time, json
+sys.path[:0] = [{BENCH_DIR!r}, {ROOT_DIR!r}]
+import backend
+from fake_device import FakeFleet
+
+routers = backend.load_inventory()['routers']
+fleet = FakeFleet(connect_latency=0.01, command_latency=0.005, change_rate=1.0,
+                  names={{r['ip']: r['hostname'] for r in routers}})
+slow = routers[0]
+def connect(**params):
+    if params['host'] == slow['ip']:
+        time.sleep(7.5)
+    return fleet.connect(**params)
+backend.ConnectHandler = connect
+alerts = []
+backend.send_alert = lambda *args, **kwargs: alerts.append(kwargs.get('host'))
+
+fleet.next_cycle()
+repo = backend.SHARDS.for_host(slow['hostname']).repo
+before = repo.head.commit.hexsha
+summary = backend.run_backup_fleet(routers, max_workers=len(routers), device_timeout=1, batch={{batch}})
+statuses = {{x['hostname']: x['status'] for x in summary['results']}}
+time.sleep(3)  # thread router lambat selesai setelah summary dibuat
+late_commits = [c.hexsha for c in repo.iter_commits(f"{{before}}..HEAD", paths=slow['hostname'] + ".cfg")]
+print(json.dumps({{"status": statuses[slow['hostname']], "late_commits": late_commits,
+                  "alerts": [h for h in alerts if h == slow['hostname']]}}))
+"""
+
+# Mode antrian: worker mengompres capture selama streaming, committer mendekompres ke repo.
+# Run biasa sesudahnya (siklus yang sama) harus "No Change" untuk semua router.
+_QUEUE_RUN = f"""
+import sys, json, tempfile
+sys.path[:0] = [{BENCH_DIR!r}, {ROOT_DIR!r}]
+import backend
+from fake_device import FakeFleet
+
+routers = backend.load_inventory()['routers']
+fleet = FakeFleet(connect_latency=0.01, command_latency=0.005, change_rate=1.0,
+                  names={{r['ip']: r['hostname'] for r in routers}})
+backend.ConnectHandler = fleet.connect
+backend.send_alert = lambda *args, **kwargs: None
+
+captures = []
+fetch_config = backend.fetch_config
+def capture(*args, **kwargs):
+    clean = fetch_config(*args, **kwargs)
+    with open(clean.path, "rb") as f:
+        captures.append((clean.compressed, f.read(2)))
+    return clean
+backend.fetch_config = capture
+
+fleet.next_cycle()
+backend.enqueue_backups(routers)
+while True:
+    jobs = backend.JOB_QUEUE.claim("w1", 60)
+    if not jobs:
+        break
+    backend.process_queue_job(jobs[0], "w1", timeout=5)
+queued = {{x['hostname']: x['status'] for x in backend.commit_queued()}}
+backend.fetch_config = fetch_config
+again = backend.run_backup_fleet(routers, max_workers=4, device_timeout=5)
+print(json.dumps({{"queued": queued, "again": {{x['hostname']: x['status'] for x in again['results']}},
+                  "captures": [[c, h.hex()] for c, h in captures],
+                  "leftover": [n for n in __import__("os").listdir(tempfile.gettempdir()) if n.endswith(".capture")]}}))
+"""
+
+class QueueModeTest(unittest.TestCase):
+    """Config lewat antrian job (terkompresi) sama persis dengan hasil tarik langsung."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="netauto_queue_")
+        build_workspace(self.tmp, 4, 3)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def run_queue(self, stream):
+        capture_tmp = os.path.join(self.tmp, "tmp")
+        os.makedirs(capture_tmp)
+        env = dict(os.environ, TELEGRAM_TOKEN="", PYTHONDONTWRITEBYTECODE="1", TMPDIR=capture_tmp,
+                   STREAM_CAPTURE=str(int(stream)), BACKUP_SCHEDULE="all",
+                   METRICS_FILE=os.path.join(self.tmp, "metrics.jsonl"),
+                   METRICS_PROM_FILE=os.path.join(self.tmp, "netauto.prom"))
+        out = subprocess.run([sys.executable, "-c", _QUEUE_RUN], cwd=self.tmp, env=env,
+                             capture_output=True, text=True, timeout=120)
+        self.assertEqual(out.returncode, 0, out.stderr)
+        return json.loads(out.stdout.strip().splitlines()[-1])
+
+    def check(self, result):
+        self.assertEqual(len(result["queued"]), 4)
+        self.assertEqual(set(result["queued"].values()), {"Changed"})
+        self.assertEqual(set(result["again"].values()), {"No Change"})
+        # Capture worker sudah berupa zlib di disk (header 0x78), bukan teks config
+        self.assertTrue(result["captures"])
+        self.assertTrue(all(compressed and header.startswith("78") for compressed, header in result["captures"]))
+        self.assertEqual(result["leftover"], [])
+
+    def test_streamed_capture(self):
+        self.check(self.run_queue(stream=True))
+
+    def test_send_command_capture(self):
+        self.check(self.run_queue(stream=False))
+
+class TimedOutHostTest(unittest.TestCase):
+    """Router yang sudah dilaporkan Timeout tidak boleh commit / kirim alert belakangan."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="netauto_fleet_")
+        build_workspace(self.tmp, 4, 3)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def run_fleet(self, batch):
+        env = dict(os.environ, TELEGRAM_TOKEN="", PYTHONDONTWRITEBYTECODE="1",
+                   METRICS_FILE=os.path.join(self.tmp, "metrics.jsonl"),
+                   METRICS_PROM_FILE=os.path.join(self.tmp, "netauto.prom"))
+        out = subprocess.run([sys.executable, "-c", _LATE_RUN.replace("{batch}", str(batch))],
+                             cwd=self.tmp, env=env, capture_output=True, text=True, timeout=120)
+        self.assertEqual(out.returncode, 0, out.stderr)
+        return json.loads(out.stdout.strip().splitlines()[-1])
+
+    def test_late_result_discarded_non_batch(self):
+        result = self.run_fleet(batch=False)
+        self.assertEqual(result["status"], "Timeout")
+        self.assertEqual(result["late_commits"], [])
+        self.assertEqual(result["alerts"], [])
+
+    def test_late_result_discarded_batch(self):
+        result = self.run_fleet(batch=True)
+        self.assertEqual(result["status"], "Timeout")
+        self.assertEqual(result["late_commits"], [])
+        self.assertEqual(result["alerts"], [])
+        self.assertEqual([n for n in os.listdir(os.path.join(self.tmp, "backups")) if n.endswith(".capture")], [])
+
+if __name__ == "__main__":
+    unittest.main()
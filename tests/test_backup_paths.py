@@ -0,0 +1,67 @@
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+import unittest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(ROOT_DIR, "benchmarks")
+sys.path[:0] = [BENCH_DIR, ROOT_DIR]
+
+from synth_repo import build_workspace
+
+# Dijalankan di proses baru: backend membaca cwd & env saat di-import
+_BACKUP_RUN = f"""
+import sys
+sys.path[:0] = [{BENCH_DIR!r}, {ROOT_DIR!r}]
+import backend
+from fake_device import FakeFleet
+
+routers = backend.load_inventory()['routers']
+fleet = FakeFleet(connect_latency=0.01, command_latency=0.005, change_rate=0.5,
+                  names={{r['ip']: r['hostname'] for r in routers}})
+backend.ConnectHandler = fleet.connect
+backend.send_alert = lambda *args, **kwargs: None
+for _ in range(3):
+    fleet.next_cycle()
+    summary = backend.run_backup_fleet(routers, max_workers=8, batch=False, probe=True)
+    assert summary['failed'] == 0 and summary['timeout'] == 0, summary
+backend.flush_metrics()
+"""
+
+class ThreadedBackupPathsTest(unittest.TestCase):
+    """
+    Backup non-batch: thread worker commit lewat GitPython, yang chdir ke repo backup
+    untuk seluruh proses. File state/metrik dari thread lain tidak boleh ikut masuk ke repo.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="netauto_paths_")
+        build_workspace(self.tmp, 30, 5)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_threaded_backup_writes_nothing_into_repo(self):
+        env = dict(os.environ, TELEGRAM_TOKEN="", BACKUP_BATCH="0", BACKUP_PROBE="1",
+                   BACKUP_SHARDING="none", PYTHONDONTWRITEBYTECODE="1")
+        for key in ("METRICS_FILE", "METRICS_PROM_FILE", "QUEUE_FILE", "BACKUP_SHARD_DIR"):
+            env.pop(key, None)
+        out = subprocess.run([sys.executable, "-c", _BACKUP_RUN], cwd=self.tmp, env=env,
+                             capture_output=True, text=True, timeout=300)
+        self.assertEqual(out.returncode, 0, out.stderr)
+
+        repo_dir = os.path.join(self.tmp, "backups")
+        extra = [n for n in os.listdir(repo_dir) if n != ".git" and not n.endswith(".cfg")]
+        self.assertEqual(extra, [])
+        status = subprocess.run(["git", "status", "--porcelain"], cwd=repo_dir,
+                                capture_output=True, text=True, check=True).stdout
+        self.assertEqual(status, "")
+
+        # File state tetap satu salinan di state/ milik workspace
+        for name in ("probe_markers.json", "metrics.jsonl", "netauto.prom"):
+            self.assertTrue(os.path.exists(os.path.join(self.tmp, "state", name)), name)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,233 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import subprocess
+import unittest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(ROOT_DIR, "benchmarks")
+sys.path[:0] = [BENCH_DIR, ROOT_DIR]
+
+from config_diff import compute_delta, diff_sections, parse_config
+
+BASE = """\
+Building configuration...
+Current configuration : 1234 bytes
+!
+version 15.6
+hostname r1
+no ip domain-lookup
+!
+interface GigabitEthernet1
+ description uplink
+ ip address 10.0.0.1 255.255.255.0
+ shutdown
+!
+router bgp 65000
+ neighbor 10.0.0.2 remote-as 65001
+ address-family ipv4
+  network 10.0.0.0 mask 255.255.255.0
+  neighbor 10.0.0.2 activate
+ exit-address-family
+!
+ip access-list extended EDGE
+ remark --- mgmt ---
+ permit tcp any host 10.0.0.1 eq 22
+ remark --- mgmt ---
+ deny ip any any log
+!
+access-list 10 permit 10.1.0.0 0.0.255.255
+access-list 10 deny any
+!
+end
+"""
+
+def edit(text, old, new):
+    assert old in text, old
+    return text.replace(old, new, 1)
+
+class ParseConfigTest(unittest.TestCase):
+
+    def test_duplicate_lines_kept(self):
+        root = parse_config(BASE)
+        acl = next(n for n in root.children.values() if n.line == "ip access-list extended EDGE")
+        self.assertEqual([c.line for c in acl.children.values()], [
+            "remark --- mgmt ---", "permit tcp any host 10.0.0.1 eq 22", "remark --- mgmt ---", "deny ip any any log",
+        ])
+        self.assertEqual(acl.render()[1:], [" remark --- mgmt ---", " permit tcp any host 10.0.0.1 eq 22",
+                                            " remark --- mgmt ---", " deny ip any any log"])
+
+    def test_header_lines_ignored(self):
+        lines = [n.line for n in parse_config(BASE).children.values()]
+        self.assertNotIn("version 15.6", lines)
+        self.assertNotIn("end", lines)
+        self.assertFalse(any(l.startswith(("Building", "Current")) for l in lines))
+
+class ComputeDeltaTest(unittest.TestCase):
+
+    def assertDelta(self, current, target, expected):
+        commands, problems = compute_delta(current, target)
+        self.assertEqual(problems, [])
+        self.assertEqual(commands, expected)
+
+    def test_identical_config_no_commands(self):
+        self.assertDelta(BASE, BASE, [])
+
+    def test_nested_section_change(self):
+        target = edit(BASE, "  network 10.0.0.0 mask 255.255.255.0\n",
+                      "  network 10.0.0.0 mask 255.255.255.0\n  network 10.9.0.0 mask 255.255.0.0\n")
+        self.assertDelta(BASE, target, [
+            "router bgp 65000", "address-family ipv4", "network 10.9.0.0 mask 255.255.0.0", "exit", "exit",
+        ])
+
+    def test_new_section_added_with_children(self):
+        target = BASE.replace("!\nend\n", "interface Loopback0\n ip address 1.1.1.1 255.255.255.255\n!\nend\n")
+        self.assertDelta(BASE, target, [
+            "interface Loopback0", "ip address 1.1.1.1 255.255.255.255", "exit",
+        ])
+
+    def test_removed_lines_negated(self):
+        target = edit(BASE, " description uplink\n", "")
+        target = edit(target, "no ip domain-lookup\n", "")
+        self.assertDelta(BASE, target, [
+            "ip domain-lookup", "interface GigabitEthernet1", "no description uplink", "exit",
+        ])
+
+    def test_negation_replaces_line_once(self):
+        # "shutdown" -> "no shutdown": cukup satu perintah, bukan "no shutdown" dua kali
+        target = edit(BASE, " shutdown\n", " no shutdown\n")
+        self.assertDelta(BASE, target, ["interface GigabitEthernet1", "no shutdown", "exit"])
+
+    def test_named_acl_rewritten_in_order(self):
+        target = edit(BASE, " deny ip any any log\n",
+                      " permit icmp any any\n deny ip any any log\n")
+        self.assertDelta(BASE, target, [
+            "no ip access-list extended EDGE",
+            "ip access-list extended EDGE",
+            "remark --- mgmt ---",
+            "permit tcp any host 10.0.0.1 eq 22",
+            "remark --- mgmt ---",
+            "permit icmp any any",
+            "deny ip any any log",
+            "exit",
+        ])
+
+    def test_named_acl_reorder_detected(self):
+        target = edit(BASE, " permit tcp any host 10.0.0.1 eq 22\n remark --- mgmt ---\n",
+                      " remark --- mgmt ---\n permit tcp any host 10.0.0.1 eq 22\n")
+        commands, problems = compute_delta(BASE, target)
+        self.assertEqual(problems, [])
+        self.assertEqual(commands[:2], ["no ip access-list extended EDGE", "ip access-list extended EDGE"])
+        self.assertEqual(commands[2:-1], ["remark --- mgmt ---", "remark --- mgmt ---",
+                                          "permit tcp any host 10.0.0.1 eq 22", "deny ip any any log"])
+
+    def test_duplicate_acl_entry_removed(self):
+        # Salinan kedua remark hilang: tanpa node terpisah perbedaan ini tidak terdeteksi
+        target = edit(BASE, " remark --- mgmt ---\n deny", " deny")
+        commands, problems = compute_delta(BASE, target)
+        self.assertEqual(problems, [])
+        self.assertEqual(commands, [
+            "no ip access-list extended EDGE", "ip access-list extended EDGE", "remark --- mgmt ---",
+            "permit tcp any host 10.0.0.1 eq 22", "deny ip any any log", "exit",
+        ])
+
+    def test_numbered_acl_order_kept(self):
+        target = edit(BASE, "access-list 10 permit 10.1.0.0 0.0.255.255\n",
+                      "access-list 10 permit 10.2.0.0 0.0.255.255\naccess-list 10 permit 10.1.0.0 0.0.255.255\n")
+        self.assertDelta(BASE, target, [
+            "no access-list 10",
+            "access-list 10 permit 10.2.0.0 0.0.255.255",
+            "access-list 10 permit 10.1.0.0 0.0.255.255",
+            "access-list 10 deny any",
+        ])
+
+    def test_numbered_acl_duplicate_lines_kept(self):
+        current = "access-list 20 remark x\naccess-list 20 permit any\naccess-list 20 remark x\n"
+        target = "access-list 20 remark x\naccess-list 20 permit any\n"
+        self.assertDelta(current, target, [
+            "no access-list 20", "access-list 20 remark x", "access-list 20 permit any",
+        ])
+
+    def test_duplicate_line_in_unordered_section_is_unsafe(self):
+        # "no X" menghapus semua salinan X -> tidak bisa diubah sebagian, harus full replace
+        current = "interface Gi2\n ip helper-address 10.0.0.9\n ip helper-address 10.0.0.9\n"
+        target = "interface Gi2\n ip helper-address 10.0.0.9\n"
+        _, problems = compute_delta(current, target)
+        self.assertTrue(problems)
+
+    def test_unsafe_block_reported(self):
+        target = BASE.replace("!\nend\n", "banner motd ^C hello ^C\n!\nend\n")
+        _, problems = compute_delta(BASE, target)
+        self.assertTrue(any("banner" in p for p in problems))
+
+class DiffSectionsTest(unittest.TestCase):
+
+    def test_sections(self):
+        target = edit(BASE, " description uplink\n", " description core\n")
+        target = edit(target, "no ip domain-lookup\n", "ip domain-name lab\n")
+        sections = {s["section"]: s for s in diff_sections(BASE, target)}
+        self.assertEqual(sections["(global)"]["removed"], ["no ip domain-lookup"])
+        self.assertEqual(sections["(global)"]["added"], ["ip domain-name lab"])
+        intf = sections["interface GigabitEthernet1"]
+        self.assertEqual((intf["removed"], intf["added"]), ([" description uplink"], [" description core"]))
+
+# Restore delta ke router palsu yang menolak perintah (% Invalid) -> harus jatuh ke full replace
+_RESTORE_RUN = f"""
+import sys, json
+sys.path[:0] = [{BENCH_DIR!r}, {ROOT_DIR!r}]
+import backend
+from fake_device import FakeFleet, fake_file_transfer
+
+routers = backend.load_inventory()['routers']
+fleet = FakeFleet(connect_latency=0, command_latency=0, change_rate=1.0,
+                  names={{r['ip']: r['hostname'] for r in routers}})
+commands, transfers = [], []
+def connect(**params):
+    conn = fleet.connect(**params)
+    def send_config_set(cmds, **kwargs):
+        commands.extend(cmds)
+        return cmds[0] + "\\n% Invalid input detected at '^' marker."
+    conn.send_config_set = send_config_set
+    return conn
+transfer = fake_file_transfer(fleet)
+def file_transfer(net_connect, **kwargs):
+    transfers.append(kwargs['dest_file'])
+    return transfer(net_connect, **kwargs)
+backend.ConnectHandler = connect
+backend.file_transfer = file_transfer
+backend.send_alert = lambda *args, **kwargs: None
+
+r = routers[0]
+commit = backend.SHARDS.for_host(r['hostname']).repo.head.commit.hexsha
+fleet.next_cycle()  # running-config bergeser dari backup
+success, msg = backend.run_restore_task(r['hostname'], r['ip'], r['device_type'], commit, mode="delta")
+print(json.dumps({{"success": success, "msg": msg, "commands": len(commands), "transfers": transfers}}))
+"""
+
+class DeltaRestoreFallbackTest(unittest.TestCase):
+
+    def setUp(self):
+        from synth_repo import build_workspace
+        self.tmp = tempfile.mkdtemp(prefix="netauto_delta_")
+        build_workspace(self.tmp, 2, 2)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_invalid_output_falls_back_to_full_replace(self):
+        env = dict(os.environ, TELEGRAM_TOKEN="", PYTHONDONTWRITEBYTECODE="1",
+                   METRICS_FILE=os.path.join(self.tmp, "metrics.jsonl"),
+                   METRICS_PROM_FILE=os.path.join(self.tmp, "netauto.prom"))
+        out = subprocess.run([sys.executable, "-c", _RESTORE_RUN], cwd=self.tmp, env=env,
+                             capture_output=True, text=True, timeout=120)
+        self.assertEqual(out.returncode, 0, out.stderr)
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        self.assertGreater(result["commands"], 0)  # delta sempat dicoba
+        self.assertEqual(result["transfers"], ["restore_candidate.cfg"])
+        self.assertTrue(result["success"])
+        self.assertIn("full replace", result["msg"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+# Metrik push (metrics.timed) jangan sampai menulis ke state/ di working tree
+_METRICS_DIR = tempfile.mkdtemp(prefix="netauto_metrics_")
+os.environ.setdefault("METRICS_FILE", os.path.join(_METRICS_DIR, "metrics.jsonl"))
+os.environ.setdefault("METRICS_PROM_FILE", os.path.join(_METRICS_DIR, "netauto.prom"))
+
+import git
+from git_push import PushWorker
+
+def wait_until(cond, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if cond():
+            return True
+        time.sleep(0.02)
+    return False
+
+class PushWorkerTest(unittest.TestCase):
+    """PushWorker ke bare repo lokal sebagai origin (tanpa jaringan / GitHub)."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="netauto_push_")
+        self.origin_path = os.path.join(self.tmp, "origin.git")
+        self.origin = git.Repo.init(self.origin_path, bare=True)
+        self.repo = git.Repo.init(os.path.join(self.tmp, "work"))
+        with self.repo.config_writer() as cw:
+            cw.set_value("user", "name", "test")
+            cw.set_value("user", "email", "test@example.com")
+        self.repo.create_remote("origin", self.origin_path)
+        self.commit("r1", "hostname r1\n")
+        self.branch = self.repo.active_branch.name
+        self.alerts = []
+        self.worker = PushWorker(self.repo, base_delay=0.05, max_delay=0.2, alert_after=3,
+                                 on_error=lambda error, failures: self.alerts.append(failures),
+                                 status_file=os.path.join(self.tmp, "state", "push_status.json"))
+
+    def tearDown(self):
+        self.worker.stop()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def commit(self, hostname, text):
+        with open(os.path.join(self.repo.working_tree_dir, f"{hostname}.cfg"), "w") as f:
+            f.write(text)
+        self.repo.index.add([f"{hostname}.cfg"])
+        return self.repo.index.commit(f"Backup {hostname}").hexsha
+
+    def origin_head(self):
+        try:
+            return self.origin.commit(self.branch).hexsha
+        except Exception:
+            return None
+
+    def test_push_to_local_bare_origin(self):
+        self.repo.git.push("--set-upstream", "origin", self.branch)
+        sha = self.commit("r2", "hostname r2\n")
+        self.assertTrue(self.worker.request())
+        self.assertTrue(self.worker.flush(timeout=10))
+        self.assertEqual(self.origin_head(), sha)
+        stats = self.worker.stats()
+        self.assertFalse(stats["pending"])
+        self.assertEqual(stats["consecutive_failures"], 0)
+        self.assertIsNotNone(stats["last_success"])
+        self.assertTrue(os.path.exists(self.worker.status_file))
+
+    def test_requests_are_coalesced(self):
+        self.repo.git.push("--set-upstream", "origin", self.branch)
+        # Tahan push pertama di "remote" agar request berikutnya menumpuk selama push berjalan
+        release = threading.Event()
+        push_once = self.worker._push_once
+
+        def blocked_push():
+            release.wait(10)
+            return push_once()
+
+        self.worker._push_once = blocked_push
+        self.commit("r0", "hostname r0\n")
+        self.worker.request()
+        self.assertTrue(wait_until(lambda: self.worker.stats()["in_flight"]))
+
+        queued = 5
+        for i in range(1, queued + 1):
+            self.commit(f"r{i}", f"hostname r{i}\n")
+            self.worker.request()
+        release.set()
+
+        self.assertTrue(self.worker.flush(timeout=10))
+        self.assertEqual(self.origin_head(), self.repo.head.commit.hexsha)
+        self.assertEqual(self.worker.requests, queued + 1)
+        # Push yang ditahan + satu push untuk semua request yang menumpuk
+        self.assertEqual(self.worker.pushes, 2)
+
+    def test_retry_and_alert_after(self):
+        self.repo.git.push("--set-upstream", "origin", self.branch)
+        sha = self.commit("r2", "hostname r2\n")
+        # Origin "hilang" -> push gagal dan diulang dengan backoff
+        moved = f"{self.origin_path}.moved"
+        os.rename(self.origin_path, moved)
+        self.worker.request()
+        self.assertTrue(wait_until(lambda: self.worker.failures >= 4))
+        self.assertEqual(self.alerts, [3])  # alert sekali, tepat di kegagalan ke-alert_after
+        stats = self.worker.stats()
+        self.assertTrue(stats["pending"])
+        self.assertIsNotNone(stats["last_error"])
+
+        # Origin kembali -> retry berikutnya sukses tanpa request baru
+        os.rename(moved, self.origin_path)
+        self.assertTrue(self.worker.flush(timeout=10))
+        self.assertEqual(self.origin_head(), sha)
+        self.assertEqual(self.worker.failures, 0)
+        self.assertIsNone(self.worker.stats()["last_error"])
+        self.assertEqual(self.alerts, [3])
+
+    def test_request_without_remote(self):
+        self.repo.delete_remote("origin")
+        self.assertFalse(self.worker.request())
+        self.assertIsNone(self.worker._thread)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import os
+import re
+import sys
+import shutil
+import tempfile
+import threading
+import subprocess
+import contextvars
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from metrics import MetricsRecorder, read_events
+
+def prom_value(path, metric, **labels):
+    """Nilai satu sampel di file Prometheus (None jika tidak ada)."""
+    with open(path) as f:
+        text = f.read()
+    for line in text.splitlines():
+        m = re.match(r"^(\w+)\{(.*)\} (\S+)$", line)
+        if not m or m.group(1) != metric:
+            continue
+        found = dict(re.findall(r'(\w+)="([^"]*)"', m.group(2)))
+        if all(found.get(k) == v for k, v in labels.items()):
+            return float(m.group(3))
+    return None
+
+class PrometheusTotalsTest(unittest.TestCase):
+    """Beberapa proses (cron tiap menit, daemon, dashboard) berbagi satu netauto.prom."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="netauto_metrics_")
+        self.events = os.path.join(self.tmp, "metrics.jsonl")
+        self.prom = os.path.join(self.tmp, "netauto.prom")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def recorder(self):
+        return MetricsRecorder(self.events, self.prom, flush_interval=3600)
+
+    def count(self, outcome="ok"):
+        return prom_value(self.prom, "netauto_phase_total", operation="backup", phase="total", outcome=outcome)
+
+    def test_counters_survive_new_process(self):
+        first = self.recorder()
+        for _ in range(3):
+            first.record("backup", "total", 0.2)
+        first.flush()
+        self.assertEqual(self.count(), 3)
+
+        # "Proses cron berikutnya": recorder baru tidak mereset counter
+        second = self.recorder()
+        second.record("backup", "total", 0.2)
+        second.record("backup", "total", 7, outcome="error")
+        second.flush()
+        self.assertEqual(self.count(), 4)
+        self.assertEqual(self.count("error"), 1)
+        labels = dict(operation="backup", phase="total")
+        self.assertEqual(prom_value(self.prom, "netauto_phase_duration_seconds_count", **labels), 5)
+        self.assertEqual(prom_value(self.prom, "netauto_phase_duration_seconds_bucket", le="0.25", **labels), 4)
+        self.assertAlmostEqual(prom_value(self.prom, "netauto_phase_duration_seconds_sum", **labels), 7.8)
+
+    def test_flush_does_not_double_count(self):
+        rec = self.recorder()
+        rec.record("backup", "total", 0.2)
+        rec.flush()
+        rec.flush()
+        rec.record("backup", "total", 0.2)
+        rec.flush()
+        self.assertEqual(self.count(), 2)
+
+    def test_concurrent_processes(self):
+        code = (
+            "import sys; sys.path.insert(0, %r)\n"
+            "from metrics import MetricsRecorder\n"
+            "rec = MetricsRecorder(%r, %r, flush_interval=3600)\n"
+            "for i in range(200):\n"
+            "    rec.record('backup', 'total', 0.01)\n"
+            "    if i %% 10 == 0: rec.flush()\n"
+            "rec.flush()\n"
+        ) % (ROOT_DIR, self.events, self.prom)
+        procs = [subprocess.Popen([sys.executable, "-c", code]) for _ in range(4)]
+        for p in procs:
+            self.assertEqual(p.wait(timeout=60), 0)
+        self.assertEqual(self.count(), 800)
+
+class RunIdTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="netauto_metrics_")
+        self.events = os.path.join(self.tmp, "metrics.jsonl")
+        self.rec = MetricsRecorder(self.events, os.path.join(self.tmp, "netauto.prom"), flush_interval=3600)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def run_operation(self, label, ids, barrier):
+        # Seperti run_backup_fleet: start_run lalu job di thread pool lewat copy_context
+        ids[label] = self.rec.start_run(label)
+        barrier.wait()  # kedua operasi sudah start_run sebelum ada yang mencatat
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            for i in range(6):
+                executor.submit(contextvars.copy_context().run, self.rec.record, label, "total", 0.1, "ok", f"h{i}")
+
+    def test_concurrent_runs_keep_their_own_id(self):
+        ids, barrier = {}, threading.Barrier(2)
+        threads = [threading.Thread(target=self.run_operation, args=(label, ids, barrier))
+                   for label in ("backup", "restore")]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.rec.flush()
+
+        self.assertNotEqual(ids["backup"], ids["restore"])
+        events = read_events(self.events)
+        self.assertEqual(len(events), 12)
+        for event in events:
+            self.assertEqual(event["run"], ids[event["operation"]])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import os
+import sys
+import json
+import time
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+# Metrik pengiriman (metrics.timed) jangan sampai menulis ke state/ di working tree
+_METRICS_DIR = tempfile.mkdtemp(prefix="netauto_metrics_")
+os.environ.setdefault("METRICS_FILE", os.path.join(_METRICS_DIR, "metrics.jsonl"))
+os.environ.setdefault("METRICS_PROM_FILE", os.path.join(_METRICS_DIR, "netauto.prom"))
+
+from notifications import AlertDispatcher
+
+class FakeBotAPI(ThreadingHTTPServer):
+    """Stand-in lokal Bot API Telegram: catat setiap sendMessage, bisa membalas 429."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.messages = []      # teks yang diterima (200)
+        self.requests = []      # (waktu, status) setiap POST
+        self.throttle = []      # antrian retry_after untuk POST berikutnya (429)
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()
+        form = {k: v[0] for k, v in parse_qs(body).items()}
+        server = self.server
+        with server.lock:
+            retry_after = server.throttle.pop(0) if server.throttle else None
+            status = 429 if retry_after is not None else 200
+            server.requests.append((time.monotonic(), status))
+            if status == 200:
+                server.messages.append(form["text"])
+        if status == 429:
+            payload = {"ok": False, "error_code": 429, "parameters": {"retry_after": retry_after}}
+        else:
+            payload = {"ok": True, "result": {"text": form["text"]}}
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+class AlertDispatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.api = FakeBotAPI()
+        threading.Thread(target=self.api.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.api.shutdown()
+        self.api.server_close()
+
+    def dispatcher(self, **kwargs):
+        options = dict(api_url=self.api.url, max_per_minute=600, digest_window=0.2,
+                       digest_min=3, dedup_ttl=60)
+        options.update(kwargs)
+        return AlertDispatcher("TOKEN", "123", **options)
+
+    def test_burst_grouped_into_digest(self):
+        d = self.dispatcher()
+        for i in range(5):
+            d.submit("CONFIG CHANGE DETECTED", f"Router: r{i}\nConfig berubah", "warning", host=f"r{i}")
+        d.submit("BACKUP GAGAL", "Router: x1\nError: timeout", "error", host="x1")
+        self.assertTrue(d.flush(timeout=10))
+
+        self.assertEqual(len(self.api.messages), 2)
+        digest = next(m for m in self.api.messages if "CONFIG CHANGE" in m)
+        self.assertIn("CONFIG CHANGE DETECTED (5 router)", digest)
+        for i in range(5):
+            self.assertIn(f"`r{i}`", digest)
+        # Di bawah digest_min dikirim apa adanya
+        single = next(m for m in self.api.messages if "BACKUP GAGAL" in m)
+        self.assertIn("Error: timeout", single)
+        self.assertEqual(d.sent, 2)
+
+    def test_duplicate_errors_suppressed(self):
+        d = self.dispatcher(dedup_ttl=0.5)
+        for _ in range(3):
+            d.submit("BACKUP GAGAL", "Error: auth", "error", host="r1")
+        d.submit("BACKUP GAGAL", "Error: auth", "error", host="r2")  # host lain tetap dikirim
+        self.assertTrue(d.flush(timeout=10))
+        self.assertEqual(len(self.api.messages), 2)
+        self.assertEqual(d.suppressed, 2)
+
+        # Setelah dedup_ttl lewat, error yang sama dikirim lagi beserta jumlah yang diredam
+        time.sleep(0.6)
+        d.submit("BACKUP GAGAL", "Error: auth", "error", host="r1")
+        self.assertTrue(d.flush(timeout=10))
+        self.assertEqual(len(self.api.messages), 3)
+        self.assertIn("+2x error serupa diredam", self.api.messages[-1])
+
+    def test_429_retry_after_respected(self):
+        self.api.throttle = [0.5]
+        d = self.dispatcher()
+        d.submit("RESTORE", "Router r1 berhasil di-restore", "success")
+        self.assertTrue(d.flush(timeout=10))
+
+        self.assertEqual([status for _, status in self.api.requests], [429, 200])
+        waited = self.api.requests[1][0] - self.api.requests[0][0]
+        self.assertGreaterEqual(waited, 0.45)
+        self.assertEqual(len(self.api.messages), 1)
+        self.assertEqual((d.sent, d.failed), (1, 0))
+
+    def test_send_now_respects_rate_limit(self):
+        # 120/menit = 1 token per 0.5 dtk; bucket dikecilkan ke 1 token agar burst tidak lolos
+        d = self.dispatcher(max_per_minute=120)
+        d.capacity = d._tokens = 1.0
+        started = time.monotonic()
+        for i in range(3):
+            self.assertTrue(d.send_now("RESTORE", f"Router r{i} berhasil di-restore", "success"))
+        self.assertGreaterEqual(time.monotonic() - started, 0.9)
+        self.assertEqual(len(self.api.messages), 3)
+
+        # Dedup error juga berlaku di mode sinkron
+        for _ in range(2):
+            self.assertTrue(d.send_now("BACKUP GAGAL", "Error: auth", "error", host="r1"))
+        self.assertEqual(len(self.api.messages), 4)
+        self.assertEqual(d.suppressed, 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import sys
+import threading
+import unittest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from session_pool import SessionPool
+
+class FakeConn:
+    def __init__(self, params):
+        self.params = params
+        self.closed = False
+
+    def is_alive(self):
+        return not self.closed
+
+    def disconnect(self):
+        self.closed = True
+
+class SessionPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.opened = []
+        self.pool = SessionPool(self.connect, borrow_timeout=0.2)
+
+    def connect(self, params):
+        conn = FakeConn(params)
+        self.opened.append(conn)
+        return conn
+
+    def test_stuck_session_falls_back_to_overflow(self):
+        params = {"host": "10.0.0.1"}
+        holding, release = threading.Event(), threading.Event()
+
+        def stuck_task():
+            with self.pool.borrow("r1", params):
+                holding.set()
+                release.wait(10)
+
+        t = threading.Thread(target=stuck_task)
+        t.start()
+        self.assertTrue(holding.wait(5))
+        try:
+            with self.pool.borrow("r1", params) as conn:
+                pooled = self.opened[0]
+                self.assertIsNot(conn, pooled)
+            # Koneksi overflow ditutup setelah dipakai, sesi pool tetap utuh
+            self.assertTrue(conn.closed)
+            self.assertFalse(pooled.closed)
+        finally:
+            release.set()
+            t.join()
+        self.assertEqual(self.pool.stats["overflow"], 1)
+
+        # Setelah dilepas, sesi pool dipakai ulang seperti biasa
+        with self.pool.borrow("r1", params) as conn:
+            self.assertIs(conn, pooled)
+        self.assertEqual((self.pool.stats["opened"], self.pool.stats["reused"]), (1, 1))
+
+    def test_stats_consistent_under_concurrency(self):
+        def worker(n):
+            for i in range(300):
+                with self.pool.borrow(f"r{(n * 300 + i) % 16}", {"host": "x"}):
+                    pass
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        stats = self.pool.snapshot()
+        self.assertEqual(stats["opened"] + stats["reused"] + stats["overflow"], 8 * 300)
+        self.assertEqual(stats["opened"], 16)
+
+if __name__ == "__main__":
+    unittest.main()